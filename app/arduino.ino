@@ -20,6 +20,10 @@
 
 #define MAX_DISTANCE 300  // Maximum distance for ultrasonic sensors (cm)
 
+// Protocol version reported to the V command. 2 adds pushed telemetry (T command).
+#define PROTOCOL_VERSION 2
+#define MAX_TELEMETRY_RATE 20  // Hz; the three pings take up to ~50 ms
+
 // Create ultrasonic sensor objects
 NewPing sonarFront(TRIG_PIN_FRONT, ECHO_PIN_FRONT, MAX_DISTANCE);
 NewPing sonarLeft(TRIG_PIN_LEFT, ECHO_PIN_LEFT, MAX_DISTANCE);
@@ -33,6 +37,18 @@ bool magAvailable = false;
 int leftSpeed = 0;
 int rightSpeed = 0;
 
+// Telemetry stream: 0 = off, otherwise milliseconds between pushed frames
+unsigned long telemetryInterval = 0;
+unsigned long lastTelemetry = 0;
+unsigned long telemetryCount = 0;
+
+struct SensorReading {
+  int front;
+  int left;
+  int right;
+  float heading;  // degrees, -1 without a magnetometer
+};
+
 void setup() {
   // Initialize serial communication
   Serial.begin(115200);
@@ -55,70 +71,86 @@ void setup() {
 void loop() {
   // Check if there's a command from Raspberry Pi
   if (Serial.available() > 0) {
-    String command = Serial.readStringUntil('\n');
-    processCommand(command);
+    String line = Serial.readStringUntil('\n');
+    line.trim();
+
+    // Framed commands look like "#<seq>:<command>"; the reply repeats the "#<seq>:" prefix
+    // so the host can match it to the request. Unframed commands get unframed replies.
+    String prefix = "";
+    if (line.startsWith("#") && line.indexOf(':') != -1) {
+      prefix = line.substring(0, line.indexOf(':') + 1);
+      line = line.substring(line.indexOf(':') + 1);
+    }
+    processCommand(line, prefix);
   }
+
+  if (telemetryInterval > 0 && millis() - lastTelemetry >= telemetryInterval) {
+    lastTelemetry = millis();
+    sendTelemetry();
+  }
+}
+
+void reply(const String &prefix, const char *message) {
+  Serial.print(prefix);
+  Serial.println(message);
 }
 
-void processCommand(String command) {
+int commandValue(const String &command, int fallback) {
+  if (command.indexOf(':') != -1) {
+    return command.substring(command.indexOf(':') + 1).toInt();
+  }
+  return fallback;
+}
+
+void processCommand(const String &command, const String &prefix) {
   if (command.startsWith("S")) {
-    sendSensorData();  // Sensor readings
+    sendSensorData(prefix);  // Sensor readings
   }
   else if (command.startsWith("F")) {
-    int speed = 100;
-    if (command.indexOf(':') != -1) {
-      speed = command.substring(command.indexOf(':') + 1).toInt();
-    }
-    moveForward(speed);
-    Serial.println("Moving forward");
+    moveForward(commandValue(command, 100));
+    reply(prefix, "Moving forward");
   }
   else if (command.startsWith("B")) {
-    int speed = 100;
-    if (command.indexOf(':') != -1) {
-      speed = command.substring(command.indexOf(':') + 1).toInt();
-    }
-    moveBackward(speed);
-    Serial.println("Moving backward");
+    moveBackward(commandValue(command, 100));
+    reply(prefix, "Moving backward");
   }
   else if (command.startsWith("L")) {
-    int radius = 0;
-    if (command.indexOf(':') != -1) {
-      radius = command.substring(command.indexOf(':') + 1).toInt();
-    }
-    turnLeft(radius);
-    Serial.println("Turning left");
+    turnLeft(commandValue(command, 0));
+    reply(prefix, "Turning left");
   }
   else if (command.startsWith("R")) {
-    int radius = 0;
-    if (command.indexOf(':') != -1) {
-      radius = command.substring(command.indexOf(':') + 1).toInt();
-    }
-    turnRight(radius);
-    Serial.println("Turning right");
+    turnRight(commandValue(command, 0));
+    reply(prefix, "Turning right");
   }
   else if (command.startsWith("X")) {
     stopMotors();
-    Serial.println("Stopped");
+    reply(prefix, "Stopped");
+  }
+  else if (command.startsWith("V")) {
+    String version = "V:" + String(PROTOCOL_VERSION);
+    reply(prefix, version.c_str());
+  }
+  else if (command.startsWith("T")) {
+    int rate = constrain(commandValue(command, 0), 0, MAX_TELEMETRY_RATE);
+    telemetryInterval = rate > 0 ? 1000UL / rate : 0;
+    lastTelemetry = millis();
+    String ack = "T:" + String(rate);
+    reply(prefix, ack.c_str());
+  }
+  else {
+    reply(prefix, "Unknown command");
   }
 }
 
-void sendSensorData() {
-  StaticJsonDocument<256> doc;
-
+void readSensors(SensorReading &reading) {
   // Read ultrasonic sensors
-  int frontDistance = sonarFront.ping_cm();
-  int leftDistance = sonarLeft.ping_cm();
-  int rightDistance = sonarRight.ping_cm();
+  reading.front = sonarFront.ping_cm();
+  reading.left = sonarLeft.ping_cm();
+  reading.right = sonarRight.ping_cm();
 
-  if (frontDistance == 0) frontDistance = MAX_DISTANCE;
-  if (leftDistance == 0) leftDistance = MAX_DISTANCE;
-  if (rightDistance == 0) rightDistance = MAX_DISTANCE;
-
-  // Create ultrasonic JSON
-  JsonObject ultrasonic = doc.createNestedObject("ultrasonic");
-  ultrasonic["front"] = frontDistance;
-  ultrasonic["left"] = leftDistance;
-  ultrasonic["right"] = rightDistance;
+  if (reading.front == 0) reading.front = MAX_DISTANCE;
+  if (reading.left == 0) reading.left = MAX_DISTANCE;
+  if (reading.right == 0) reading.right = MAX_DISTANCE;
 
   // Magnetometer data
   if (magAvailable) {
@@ -132,16 +164,48 @@ void sendSensorData() {
     if (heading < 0) heading += 2 * PI;
     if (heading > 2 * PI) heading -= 2 * PI;
 
-    float headingDegrees = heading * 180 / PI;
-    doc["magnetometer"] = headingDegrees;
+    reading.heading = heading * 180 / PI;
   } else {
-    doc["magnetometer"] = -1.0;
+    reading.heading = -1.0;
   }
+}
 
+void sendSensorData(const String &prefix) {
+  StaticJsonDocument<256> doc;
+  SensorReading reading;
+  readSensors(reading);
+
+  // Create ultrasonic JSON
+  JsonObject ultrasonic = doc.createNestedObject("ultrasonic");
+  ultrasonic["front"] = reading.front;
+  ultrasonic["left"] = reading.left;
+  ultrasonic["right"] = reading.right;
+  doc["magnetometer"] = reading.heading;
+
+  Serial.print(prefix);
   serializeJson(doc, Serial);
   Serial.println();
 }
 
+// Pushed frame: "@T,<count>,<millis>,<front>,<left>,<right>,<heading x10>", integers only
+void sendTelemetry() {
+  SensorReading reading;
+  readSensors(reading);
+
+  Serial.print("@T,");
+  Serial.print(++telemetryCount);
+  Serial.print(',');
+  Serial.print(millis());
+  Serial.print(',');
+  Serial.print(reading.front);
+  Serial.print(',');
+  Serial.print(reading.left);
+  Serial.print(',');
+  Serial.print(reading.right);
+  Serial.print(',');
+  Serial.println(reading.heading < 0 ? -10 : (int)(reading.heading * 10));
+}
+
 void moveForward(int speed) {
   analogWrite(LEFT_MOTOR_FWD, speed);
   analogWrite(LEFT_MOTOR_BWD, 0);
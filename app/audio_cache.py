@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from app.utils import AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES
+
+INDEX_FILE = "index.json"
+INDEX_FLUSH_INTERVAL = 30.0  # seconds between index writes caused by hits alone
+
+
+class AudioCache:
+    """Content-addressed on-disk cache for synthesized speech.
+
+    Entries are keyed by (voice, output format, SSML) and evicted least-recently-used once
+    the total size exceeds max_bytes. The LRU order is persisted in an index file so it
+    survives restarts; files missing from the index are adopted as least recently used.
+    Disk errors never reach the caller: a cache directory that can't be used disables
+    caching, and a failed write just leaves that entry uncached.
+    """
+
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+        self._last_flush = 0.0
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_index()
+        except OSError as e:
+            print(f"[AudioCache] Caching disabled, cannot use {cache_dir}: {e}")
+            self.enabled = False
+            self._entries.clear()
+            self._total_bytes = 0
+
+    @staticmethod
+    def make_key(voice, output_format, ssml):
+        return hashlib.sha256("\0".join((voice, output_format, ssml)).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".audio")
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                indexed = json.load(f)
+        except (OSError, ValueError):
+            indexed = []
+
+        on_disk = {}
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".audio"):
+                    on_disk[name[:-len(".audio")]] = os.path.getsize(os.path.join(root, name))
+
+        # Unindexed files first (least recent), then the indexed LRU order
+        indexed_keys = [key for key, _ in indexed if key in on_disk]
+        for key in on_disk.keys() - set(indexed_keys):
+            self._entries[key] = on_disk[key]
+        for key in indexed_keys:
+            self._entries[key] = on_disk[key]
+        self._total_bytes = sum(self._entries.values())
+        self._evict()
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(list(self._entries.items()), f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"[AudioCache] Could not write index {self.index_path}: {e}")
+            return
+        self._last_flush = time.time()
+        self._dirty = False
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self._dirty = True
+
+    def get(self, key):
+        """Cached audio bytes for a key, or None."""
+        with self._lock:
+            if not self.enabled or key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._dirty = True
+            if time.time() - self._last_flush > INDEX_FLUSH_INTERVAL:
+                self._save_index()
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if not self.enabled:
+                return
+            path = self._path(key)
+            tmp_path = f"{path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[AudioCache] Could not store {key[:12]}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+            self._save_index()
+
+    def flush(self):
+        """Persist the LRU order if hits have changed it since the last write."""
+        with self._lock:
+            if self.enabled and self._dirty:
+                self._save_index()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """Process-wide cache instance, created on first use."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = AudioCache()
+        return _shared_cache
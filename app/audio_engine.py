@@ -0,0 +1,164 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+import pyaudio
+
+OUTPUT_FRAMES_PER_BUFFER = 1024
+
+
+class AudioEngine:
+    """Process-wide PortAudio context.
+
+    Owns one PyAudio instance for the life of the process, a persistent output stream that
+    plays whatever is queued (and silence otherwise), and input streams that are stopped
+    rather than closed between uses. Output is queued per source (e.g. one per TTS
+    streamer): sources play one after another in the order they started queuing, and each
+    can be waited on or flushed without touching the others' audio. Use
+    AudioEngine.instance() rather than constructing it.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.terminate)
+            return cls._instance
+
+    def __init__(self):
+        self.pa = pyaudio.PyAudio()
+        self._lock = threading.Lock()
+        self._output = None
+        self._output_format = None  # (rate, channels, sample_width)
+        self._frame_bytes = 2
+        self._bytes_per_second = 48000
+        self._buffers = OrderedDict()  # source -> bytearray queued for output, in play order
+        self._buffer_lock = threading.Lock()
+        self._inputs = {}  # (rate, channels, frames_per_buffer) -> stream
+        self._inputs_in_use = set()
+
+    # Output
+
+    def _output_callback(self, in_data, frame_count, time_info, status):
+        wanted = frame_count * self._frame_bytes
+        data = b""
+        with self._buffer_lock:
+            # The oldest source plays until its queue runs dry, then the next one takes over
+            while len(data) < wanted and self._buffers:
+                source, buffer = next(iter(self._buffers.items()))
+                take = wanted - len(data)
+                data += bytes(buffer[:take])
+                del buffer[:take]
+                if not buffer:
+                    del self._buffers[source]
+        if len(data) < wanted:
+            data += b"\0" * (wanted - len(data))
+        return data, pyaudio.paContinue
+
+    def _ensure_output(self, rate, channels, sample_width):
+        fmt = (rate, channels, sample_width)
+        if self._output is not None and self._output_format == fmt:
+            return
+        if self._output is not None:
+            # Format change: let queued audio finish before reopening
+            self.wait_until_drained()
+            self._output.stop_stream()
+            self._output.close()
+        self._frame_bytes = channels * sample_width
+        self._bytes_per_second = rate * self._frame_bytes
+        self._output = self.pa.open(
+            format=self.pa.get_format_from_width(sample_width),
+            channels=channels,
+            rate=rate,
+            output=True,
+            frames_per_buffer=OUTPUT_FRAMES_PER_BUFFER,
+            stream_callback=self._output_callback
+        )
+        self._output_format = fmt
+        self._output.start_stream()
+
+    def play(self, pcm, rate, channels=1, sample_width=2, source=None):
+        """Queue raw PCM from `source` on the persistent output stream; returns immediately."""
+        with self._lock:
+            self._ensure_output(rate, channels, sample_width)
+            with self._buffer_lock:
+                self._buffers.setdefault(source, bytearray()).extend(pcm)
+
+    def queued_seconds(self, source=None):
+        """Seconds of `source`'s audio (all audio when None) not yet handed to the device."""
+        with self._buffer_lock:
+            if source is None:
+                queued = sum(len(buffer) for buffer in self._buffers.values())
+            else:
+                queued = len(self._buffers.get(source, b""))
+            return queued / self._bytes_per_second
+
+    def wait_until_drained(self, stop_event=None, poll=0.05, source=None):
+        """Block until the queue (of `source`, or all) is empty; False if stop_event fired first."""
+        while self.queued_seconds(source) > 0:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            time.sleep(poll)
+        return True
+
+    def flush(self, source=None):
+        """Drop `source`'s queued output (all output when None); it goes silent within one buffer."""
+        with self._buffer_lock:
+            if source is None:
+                self._buffers.clear()
+            else:
+                self._buffers.pop(source, None)
+
+    # Input
+
+    def open_input(self, rate=16000, channels=1, frames_per_buffer=1024):
+        """A started input stream for this format, reused across calls. Pair with release_input."""
+        key = (rate, channels, frames_per_buffer)
+        with self._lock:
+            if key in self._inputs_in_use:
+                raise RuntimeError(f"Input stream {key} is already in use")
+            stream = self._inputs.get(key)
+            if stream is None:
+                stream = self.pa.open(
+                    format=pyaudio.paInt16,
+                    channels=channels,
+                    rate=rate,
+                    input=True,
+                    frames_per_buffer=frames_per_buffer
+                )
+                self._inputs[key] = stream
+            elif not stream.is_active():
+                stream.start_stream()
+            self._inputs_in_use.add(key)
+            return stream
+
+    def release_input(self, stream):
+        """Stop an input stream (discarding buffered audio) but keep it open for reuse."""
+        with self._lock:
+            for key, known in self._inputs.items():
+                if known is stream:
+                    self._inputs_in_use.discard(key)
+                    break
+            try:
+                stream.stop_stream()
+            except Exception as e:
+                print(f"[AudioEngine] Error stopping input stream: {e}")
+
+    def terminate(self):
+        with self._lock:
+            streams = list(self._inputs.values())
+            if self._output is not None:
+                streams.append(self._output)
+            for stream in streams:
+                try:
+                    stream.stop_stream()
+                    stream.close()
+                except Exception:
+                    pass
+            self._inputs.clear()
+            self._output = None
+            self.pa.terminate()
@@ -1,124 +1,239 @@
 import threading
-import time
-import requests
-import pyaudio
-import wave
-from io import BytesIO
-from app.gpt_client import AzureGPT
-from app.tts_streamer import TextToSpeechStreamer
-from app.utils import AZURE_SPEECH_KEY, AZURE_SPEECH_REGION, GPT_SYSTEM_PROMPT
+import queue
+from contextlib import closing
+from app.gpt_client import AzureGPT, FUNCTION_CALL
+from app.tts_streamer import TextToSpeechStreamer, iter_sentences
+from app.audio_engine import AudioEngine
+from app.endpointer import Endpointer, DONE
+from app.stt_client import transcribe
+from app.utils import GPT_SYSTEM_PROMPT, AUDIO_RECORD_TIMEOUT, LEADING_SILENCE_TIMEOUT, TRAILING_SILENCE
 from app.navigate import navigate
-from app.current_location import current_location
+from app.current_location import current_location, geopoly
+from app.intent_router import IntentRouter
+from app.response_cache import ResponseCache
 import json
 
+CHUNK_SAMPLES = 480  # 30 ms reads, so the end of speech is noticed within one VAD frame
+
+
+class CommandJob:
+    """One voice command: its audio source and the token that cancels it."""
+
+    def __init__(self, mic_reader=None):
+        self.mic_reader = mic_reader  # MicReader positioned at the wake word, if the mic is shared
+        self.cancel_token = threading.Event()
+        self.done = threading.Event()
+
+    def cancel(self):
+        self.cancel_token.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_token.is_set()
+
 
 class CommandThread(threading.Thread):
+    """Long-lived dialog worker that runs voice commands one at a time from a queue.
+
+    Built once at boot, so the GPT client, TTS streamer, audio engine and HTTP pools are
+    ready before the first wake word. submit() cancels the job in progress through its
+    token and queues the new one; the worker picks it up as soon as the old one unwinds.
+    """
+
     def __init__(self):
-        threading.Thread.__init__(self)
-        self._stop_event = threading.Event()
+        threading.Thread.__init__(self, daemon=True)
+        self._shutdown = threading.Event()
+        self._jobs = queue.Queue()
+        self._job = CommandJob()
+        self._job.done.set()
+        self._job_lock = threading.Lock()
         self.gpt_client = AzureGPT()
-        self.tts_streamer = TextToSpeechStreamer(stop_event=self._stop_event)
+        self.tts_streamer = TextToSpeechStreamer(stop_event=self._shutdown)
+        self.router = IntentRouter.from_sources(geopoly.names)
+        self.response_cache = ResponseCache()
+
+    def submit(self, mic_reader=None):
+        """Queue a command, interrupting the one in progress; returns its CommandJob."""
+        job = CommandJob(mic_reader)
+        with self._job_lock:
+            if not self._job.done.is_set():
+                print("[CommandThread] Interrupting previous command")
+                self._job.cancel()
+                self.tts_streamer.stop_speech()
+            self._jobs.put(job)
+        return job
 
     def stop(self):
-        """Trigger thread stop and clean up resources"""
-        self._stop_event.set()
+        """Cancel the current job and shut the worker down"""
+        self._shutdown.set()
+        with self._job_lock:
+            self._job.cancel()
         self.tts_streamer.stop_speech()
+        self._jobs.put(None)
 
     def _should_stop(self):
-        """Check if stop has been requested"""
-        return self._stop_event.is_set()
+        """Check if the current job has been cancelled or the worker is shutting down"""
+        return self._job.cancelled or self._shutdown.is_set()
 
-    def _record_audio(self):
-        """Record audio using PyAudio with stop checks"""
-        p = pyaudio.PyAudio()
-        stream = p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=16000,
-            input=True,
-            frames_per_buffer=1024
-        )
-
-        frames = []
-        for _ in range(0, int(16000 / 1024 * 5)):  # 5 seconds
-            if self._should_stop():
+    def run(self):
+        while not self._shutdown.is_set():
+            job = self._jobs.get()
+            if job is None:
                 break
-            frames.append(stream.read(1024))
-
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-        return b''.join(frames)
+            with self._job_lock:
+                if not self._jobs.empty():
+                    job.cancel()  # superseded before it started
+                self._job = job
+            try:
+                if not job.cancelled:
+                    self._process()
+            except Exception as e:
+                print(f"CommandThread error: {e}")
+            finally:
+                job.done.set()
 
-    def _transcribe(self, audio_data):
-        """Send audio to Azure STT REST API"""
-        if self._should_stop():
-            return ""
+    def _new_endpointer(self):
+        return Endpointer(
+            leading_silence=LEADING_SILENCE_TIMEOUT,
+            trailing_silence=TRAILING_SILENCE,
+            max_utterance=AUDIO_RECORD_TIMEOUT
+        )
 
-        url = f"https://{AZURE_SPEECH_REGION}.stt.speech.microsoft.com/speech/recognition/conversation/cognitiveservices/v1"
-        headers = {
-            "Ocp-Apim-Subscription-Key": AZURE_SPEECH_KEY,
-            "Content-Type": "audio/wav; codec=audio/pcm; samplerate=16000"
-        }
-        params = {"language": "en-US", "format": "simple"}
+    def _read_chunks(self):
+        """Raw 30 ms PCM chunks from the shared mic ring, or the engine's input stream"""
+        mic_reader = self._job.mic_reader
+        if mic_reader is not None:
+            while not self._should_stop():
+                chunk = mic_reader.read(CHUNK_SAMPLES)
+                if chunk is None:
+                    return
+                yield chunk.tobytes()
+            return
 
+        engine = AudioEngine.instance()
+        stream = engine.open_input(rate=16000, channels=1, frames_per_buffer=1024)
         try:
-            response = requests.post(url, headers=headers, params=params, data=audio_data)
-            return response.json().get("DisplayText", "") if response.status_code == 200 else ""
-        except Exception as e:
-            print(f"STT Error: {e}")
-            return ""
+            while not self._should_stop():
+                yield stream.read(CHUNK_SAMPLES, exception_on_overflow=False)
+        finally:
+            engine.release_input(stream)
 
-    def run(self):
-        print("[CommandThread] Starting command processing")
-        try:
-            # 1. Record audio
-            audio_data = self._record_audio()
-            if self._should_stop():
-                return
+    def _record_audio(self):
+        """Yield PCM as it is recorded, until the visitor stops talking.
 
-            # 2. Transcribe using REST API
-            text = self._transcribe(audio_data)
-            print(f"Recognized: {text}")
+        Audio before the start of speech is held back and released in one go once speech is
+        confirmed, so nothing is yielded at all if the visitor never speaks.
+        """
+        endpointer = self._new_endpointer()
+        held = []
+        with closing(self._read_chunks()) as chunks:
+            for chunk in chunks:
+                state = endpointer.process(chunk)
+                if held is None:
+                    yield chunk
+                else:
+                    held.append(chunk)
+                    if endpointer.heard_speech:
+                        yield from held
+                        held = None
+                if state == DONE:
+                    break
+        print(f"[CommandThread] Recorded {endpointer.elapsed:.1f}s ({endpointer.reason or 'stopped'})")
 
-            # 3. Process with GPT
-            response = self._process_gpt(text)
+    def _transcribe(self, audio):
+        """Send a chunk generator to the STT REST API, which takes care of closing it"""
+        if self._should_stop():
+            audio.close()
+            return ""
+        return transcribe(audio, stop_event=self._job.cancel_token)
 
-            # 4. Speak response
-            if response and not self._should_stop():
-                self.tts_streamer.stream_text(response)
+    def _process(self):
+        print("[CommandThread] Starting command processing")
+        # 1. Record audio; the upload starts as soon as speech does
+        audio = self._record_audio()
+        first = next(audio, None)
+        if first is None or self._should_stop():
+            audio.close()
+            if first is None and not self._should_stop():
+                print("[CommandThread] No speech detected")
+            return
 
-        except Exception as e:
-            print(f"CommandThread error: {e}")
+        def utterance():
+            try:
+                yield  # primed below, so closing it always reaches the finally
+                yield first
+                yield from audio
+            finally:
+                audio.close()
 
-    def _process_gpt(self, text):
-        """Handle GPT processing with interrupt checks"""
-        try:
-            system_message = {
-                "role": "system",
-                "content": GPT_SYSTEM_PROMPT
-            }
-            user_message = {"role": "user", "content": text}
+        chunks = utterance()
+        next(chunks)
+        # 2. Transcribe using REST API while the rest of the utterance is recorded; the
+        # upload closes the recording, on whichever thread ends up reading it
+        text = self._transcribe(chunks)
+        if self._should_stop():
+            return
+        print(f"Recognized: {text}")
 
-            if self._should_stop():
+        # 3. Navigation and location commands go straight to their tool; anything else is
+        # processed by GPT, speaking each sentence as soon as it has been generated
+        intent = self.router.route(text)
+        if intent:
+            print(f"[CommandThread] Local intent: {intent.name} {intent.arguments}")
+            function_call = intent
+        else:
+            answer, similarity = self.response_cache.get(text)
+            if answer:
+                print(f"[CommandThread] Cached answer (similarity {similarity:.2f})")
+                self.tts_streamer.stream_text(answer, self._job.cancel_token)
                 return
+            function_call = self._stream_gpt(text)
 
-            gpt_response = self.gpt_client.get_tool_response([system_message, user_message])
+        # 4. Tool calls are spoken once they have run
+        if function_call and not self._should_stop():
+            response = self._handle_function_call(function_call)
+            if response and not self._should_stop():
+                self.tts_streamer.stream_text(response, self._job.cancel_token)
 
-            if not gpt_response or self._should_stop():
-                return
+    def _stream_gpt(self, text):
+        """Speak GPT's reply while it streams; returns its function call, if it made one"""
+        if self._should_stop():
+            return None
 
-            message = gpt_response.choices[0].message
-            function_call = message.function_call
+        messages = [
+            {"role": "system", "content": GPT_SYSTEM_PROMPT},
+            {"role": "user", "content": text}
+        ]
+        calls = []
+        spoken = []
+        failed = []
 
-            if function_call:
-                return self._handle_function_call(function_call)
-            else:
-                return self._handle_text_response(message.content)
+        def text_deltas():
+            events = self.gpt_client.stream_tool_response(messages, self._job.cancel_token)
+            try:
+                for kind, value in events:
+                    if self._should_stop():
+                        return
+                    if kind == FUNCTION_CALL:
+                        calls.append(value)
+                    else:
+                        spoken.append(value)
+                        yield value
+            except Exception as e:
+                print(f"[CommandThread] GPT Error: {e}")
+                failed.append(e)
+                if not spoken:
+                    yield "Sorry, I encountered an error processing your request."
+            finally:
+                events.close()  # a barge-in leaves the GPT stream mid-response
 
-        except Exception as e:
-            print(f"[CommandThread] GPT Error: {e}")
-            return "Sorry, I encountered an error processing your request."
+        # Synthesis of sentence N+1 overlaps playback of sentence N and generation of the rest
+        self.tts_streamer.stream_sentences(iter_sentences(text_deltas()), self._job.cancel_token)
+        answer = self._handle_text_response("".join(spoken))
+        # Only complete plain answers are reused; tool calls depend on where the robot is
+        if answer and not calls and not failed and not self._should_stop():
+            self.response_cache.put(text, answer.strip())
+        return calls[0] if calls else None
 
     def _handle_function_call(self, function_call):
         """Execute function calls with stop checks"""
@@ -1,21 +1,78 @@
+import math
+import time
 from app.localizer import GeoPolygonAnalyzer, Point
 
 map_path=r"./gjson.json"
 geopoly = GeoPolygonAnalyzer(map_path)
 
-def current_location(lat,long):
-    """Placeholder for image analysis functionality."""
-    pt=Point(lat,long)   
-    results = geopoly.analyze_point(pt)     
-    # returns distance , name , point object with <POINT (lat,long)> , 
-    # direction angle if not inside a perimeter else inside  and building id
-    final_string=""
-    for i in results:
-         final_string=f"{i[1]} is {int(i[0])} m away from you at {int(i[3])} degrees"
-    # TODO: Implement actual image analysis logic
+MOVE_THRESHOLD = 3.0  # metres the robot may drift before the answer is recomputed
+MAX_FIX_AGE = 10.0  # seconds before a GPS fix is reported as old
+
+
+class LocationService:
+    """Answers "where are we" from the live robot state.
+
+    The spoken sentence is composed once per position and reused until the robot has moved
+    more than move_threshold metres, so repeat questions cost a distance check.
+    """
+
+    def __init__(self, analyzer, move_threshold=MOVE_THRESHOLD, max_fix_age=MAX_FIX_AGE):
+        self.analyzer = analyzer
+        self.move_threshold = move_threshold
+        self.max_fix_age = max_fix_age
+        self.state = None
+        self._cached = None  # (x, y, sentence)
+
+    def bind(self, state):
+        """Read positions from a running NavigationSystem's RobotState"""
+        self.state = state
+        self._cached = None
+
+    def describe(self, lat, lon):
+        """Compose the spoken sentence for a position"""
+        idx, dist, inside = self.analyzer.locate(lat, lon)
+        if inside:
+            return f"We are at {self.analyzer.names[idx]}."
+
+        results = self.analyzer.analyze_point(Point(lon, lat))
+        # distance in metres, name, description, nearest point, compass direction, building id
+        if results[0][0] < 1:
+            sentence = f"We are right next to {results[0][1]}."
+        else:
+            sentence = f"We are near {results[0][1]}, about {int(results[0][0])} metres to its {results[0][4]}."
+        if len(results) > 1:
+            sentence += f" {results[1][1]} is about {int(results[1][0])} metres away."
+        return sentence
+
+    def current_sentence(self):
+        state = self.state
+        if state is None or (state.lat == 0 and state.lon == 0):
+            return "I don't have a GPS fix yet, so I can't tell where we are right now."
+
+        lat, lon = state.lat, state.lon
+        x, y = (float(v) for v in self.analyzer.to_local(lon, lat))
+        cached = self._cached
+        if cached is None or math.hypot(x - cached[0], y - cached[1]) > self.move_threshold:
+            cached = (x, y, self.describe(lat, lon))
+            self._cached = cached
+
+        if time.time() - state.last_gps_update > self.max_fix_age:
+            return f"My last GPS fix is a little old, but {cached[2][0].lower()}{cached[2][1:]}"
+        return cached[2]
+
+
+location_service = LocationService(geopoly)
+
+
+def current_location(lat=None, long=None):
+    """Spoken description of where the robot is; explicit coordinates override the live fix."""
+    if lat is not None and long is not None:
+        final_string = location_service.describe(lat, long)
+    else:
+        final_string = location_service.current_sentence()
     print(final_string)
-    
+
     return final_string
 
 if __name__ =="__main__":
- current_location(77.99301596481246,30.26926905394356)
\ No newline at end of file
+ current_location(30.26926905394356,77.99301596481246)
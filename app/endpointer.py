@@ -0,0 +1,96 @@
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+# Endpointer states
+WAITING = "waiting"  # no speech yet
+SPEECH = "speech"    # utterance in progress
+DONE = "done"        # recording should stop; see Endpointer.reason
+
+MIN_SPEECH_LEVEL = 300.0  # RMS (int16) below which a frame is never speech
+SPEECH_TO_NOISE = 3.0     # a frame is speech when its RMS exceeds the noise floor by this factor
+NOISE_ADAPT = 0.05        # EMA weight for updating the noise floor from silent frames
+
+
+class Endpointer:
+    """Energy-based voice activity endpointer over a stream of 16-bit PCM.
+
+    Audio is fed in chunks of any size and classified in FRAME_MS frames against an
+    adaptive noise floor. Recording is done when trailing_silence seconds pass after at
+    least min_speech seconds of speech, when no speech starts within leading_silence
+    seconds, or when the utterance has run max_utterance seconds since speech started.
+    """
+
+    def __init__(self, rate=SAMPLE_RATE, leading_silence=3.0, trailing_silence=0.7,
+                 max_utterance=5.0, min_speech=0.3, frame_ms=FRAME_MS):
+        self.rate = rate
+        self.frame_samples = int(rate * frame_ms / 1000)
+        self.frame_seconds = self.frame_samples / rate
+        self.leading_silence = leading_silence
+        self.trailing_silence = trailing_silence
+        self.max_utterance = max_utterance
+        self.min_speech = min_speech
+        self.noise_floor = MIN_SPEECH_LEVEL / SPEECH_TO_NOISE
+        self.reset()
+
+    def reset(self):
+        self.state = WAITING
+        self.reason = None
+        self.elapsed = 0.0
+        self.speech_seconds = 0.0
+        self.speech_start = None  # elapsed seconds at which the utterance began
+        self.silence_run = 0.0
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def is_speech(self, frame):
+        """Classify one frame, updating the noise floor from frames that are not speech."""
+        rms = float(np.sqrt(np.mean(np.square(frame, dtype=np.float64))))
+        speech = rms > max(MIN_SPEECH_LEVEL, self.noise_floor * SPEECH_TO_NOISE)
+        if not speech:
+            self.noise_floor += NOISE_ADAPT * (rms - self.noise_floor)
+        return speech
+
+    def _finish(self, reason):
+        self.state = DONE
+        self.reason = reason
+
+    def _step(self, frame):
+        self.elapsed += self.frame_seconds
+        if self.is_speech(frame):
+            self.speech_seconds += self.frame_seconds
+            self.silence_run = 0.0
+        else:
+            self.silence_run += self.frame_seconds
+        # Brief blips (e.g. the tail of the wake word in the pre-roll) don't start an utterance
+        if self.state == WAITING and self.speech_seconds >= self.min_speech:
+            self.state = SPEECH
+            self.speech_start = max(0.0, self.elapsed - self.min_speech)
+
+        if self.state == WAITING and self.elapsed >= self.leading_silence:
+            self._finish("no_speech")
+        elif self.state == SPEECH and self.silence_run >= self.trailing_silence:
+            self._finish("end_of_speech")
+        elif self.state == SPEECH and self.elapsed - self.speech_start >= self.max_utterance:
+            # Measured from speech onset, so a pause before talking doesn't eat into the limit
+            self._finish("max_length")
+
+    def process(self, chunk):
+        """Feed PCM (bytes or an int16 array) and return the current state."""
+        if self.state == DONE:
+            return DONE
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = np.frombuffer(chunk, dtype=np.int16)
+        samples = np.concatenate((self._pending, chunk)) if len(self._pending) else chunk
+
+        n = self.frame_samples
+        offset = 0
+        while offset + n <= len(samples) and self.state != DONE:
+            self._step(samples[offset:offset + n])
+            offset += n
+        self._pending = np.array(samples[offset:], dtype=np.int16) if self.state != DONE else self._pending[:0]
+        return self.state
+
+    @property
+    def heard_speech(self):
+        return self.speech_seconds >= self.min_speech
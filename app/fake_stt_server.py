@@ -0,0 +1,154 @@
+"""Local stand-in for the Azure speech-to-text REST endpoint.
+
+Accepts the same POST as the real service, with a Content-Length or chunked body, and
+answers with a fixed transcript. Recognition cost is simulated as a fraction of the audio
+duration (the real-time factor), spent as the audio arrives, plus a fixed finalization
+latency once the body ends. Point the robot at it with STT_ENDPOINT, or run this module to
+benchmark streamed against buffered uploads:
+
+    python -m app.fake_stt_server --seconds 2 --rtf 0.3
+    python -m app.fake_stt_server --serve --port 8765
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BYTES_PER_SECOND = 16000 * 2  # 16 kHz mono 16-bit
+
+
+class _STTHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _chunks(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()  # blank line after the last chunk
+                    return
+                data = self.rfile.read(size)
+                self.rfile.readline()  # CRLF after each chunk
+                yield data
+        else:
+            yield self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        server = self.server
+        received = 0
+        first_byte = None
+        chunked = self.headers.get("Transfer-Encoding", "").lower() == "chunked"
+        for data in self._chunks():
+            first_byte = first_byte or time.perf_counter()
+            received += len(data)
+            time.sleep(len(data) / BYTES_PER_SECOND * server.realtime_factor)
+        body_end = time.perf_counter()
+        time.sleep(server.latency)
+
+        server.last_request = {
+            "bytes": received,
+            "chunked": chunked,
+            "first_byte": first_byte,
+            "body_end": body_end,
+        }
+        payload = json.dumps({
+            "RecognitionStatus": "Success",
+            "DisplayText": server.transcript,
+            "Offset": 0,
+            "Duration": int(max(received - 44, 0) / BYTES_PER_SECOND * 1e7),
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeSTTServer:
+    def __init__(self, host="127.0.0.1", port=0, transcript="Where are we?", realtime_factor=0.3,
+                 latency=0.1):
+        self.httpd = ThreadingHTTPServer((host, port), _STTHandler)
+        self.httpd.transcript = transcript
+        self.httpd.realtime_factor = realtime_factor
+        self.httpd.latency = latency
+        self.httpd.last_request = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/speech/recognition/conversation/cognitiveservices/v1"
+
+    @property
+    def last_request(self):
+        return self.httpd.last_request
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _paced_chunks(seconds, chunk_samples=480):
+    """Synthetic PCM delivered at the pace of a live microphone."""
+    chunk = b"\x10\x00" * chunk_samples
+    for _ in range(int(seconds * 16000 / chunk_samples)):
+        time.sleep(chunk_samples / 16000)
+        yield chunk
+
+
+def benchmark(seconds=2.0, realtime_factor=0.3, latency=0.1, runs=3):
+    from app.stt_client import transcribe
+
+    server = FakeSTTServer(realtime_factor=realtime_factor, latency=latency).start()
+    try:
+        for mode in ("buffered", "streamed"):
+            waits = []
+            for _ in range(runs):
+                if mode == "buffered":
+                    audio = b"".join(_paced_chunks(seconds))
+                    speech_end = time.perf_counter()
+                    text = transcribe(audio, url=server.url)
+                else:
+                    marks = {}
+
+                    def chunks():
+                        yield from _paced_chunks(seconds)
+                        marks["speech_end"] = time.perf_counter()
+
+                    text = transcribe(chunks(), url=server.url)
+                    speech_end = marks["speech_end"]
+                waits.append(time.perf_counter() - speech_end)
+                assert text == server.httpd.transcript, text
+            print(f"{mode:>9}: transcript {min(waits) * 1000:6.0f} ms after end of speech "
+                  f"(best of {runs}, {seconds:.1f}s utterance)")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--serve", action="store_true", help="run the server until interrupted")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seconds", type=float, default=2.0, help="benchmark utterance length")
+    parser.add_argument("--rtf", type=float, default=0.3, help="simulated real-time factor")
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated finalization latency")
+    args = parser.parse_args()
+
+    if args.serve:
+        server = FakeSTTServer(port=args.port, realtime_factor=args.rtf, latency=args.latency)
+        print(f"Fake STT listening on {server.url}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+    else:
+        benchmark(args.seconds, args.rtf, args.latency)
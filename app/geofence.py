@@ -0,0 +1,98 @@
+import time
+from dataclasses import dataclass
+import numpy as np
+import shapely
+
+ENTER = "enter"
+EXIT = "exit"
+DWELL = "dwell"
+
+
+@dataclass
+class GeofenceEvent:
+    """A change in the robot's relation to one map polygon"""
+    kind: str  # ENTER, EXIT or DWELL
+    index: int
+    name: str
+    timestamp: float
+    lat: float
+    lon: float
+
+
+class GeofenceMonitor:
+    """Turns a stream of GPS fixes into enter/exit/dwell events for the analyzer's polygons.
+
+    Hysteresis: a polygon is entered once the fix is enter_margin metres inside its outline
+    and left once the fix is exit_margin metres outside it, so GPS jitter along a wall does
+    not flap. Only polygons whose extent lies within `neighbourhood` metres of the last
+    refresh point are checked; the set is refreshed after moving half that distance.
+    """
+
+    def __init__(self, analyzer, enter_margin=1.0, exit_margin=3.0, dwell_time=10.0, neighbourhood=60.0):
+        if neighbourhood / 2 <= max(enter_margin, exit_margin):
+            raise ValueError("neighbourhood must be more than twice the hysteresis margins")
+        self.analyzer = analyzer
+        self.enter_margin = enter_margin
+        self.exit_margin = exit_margin
+        self.dwell_time = dwell_time
+        self.neighbourhood = neighbourhood
+        self.inside = {}  # polygon index -> time entered
+        self._dwelled = set()
+        self._listeners = []
+        self._anchor = None
+        self._candidates = np.empty(0, dtype=np.int64)
+
+    def add_listener(self, callback):
+        """Call callback(event) for every event produced by update()."""
+        self._listeners.append(callback)
+
+    def _refresh_candidates(self, x, y):
+        reach = self.neighbourhood
+        window = shapely.box(x - reach, y - reach, x + reach, y + reach)
+        candidates = self.analyzer.tree.query(window)
+        self._candidates = np.union1d(candidates, np.fromiter(self.inside, dtype=np.int64))
+        self._anchor = (x, y)
+
+    def update(self, lat, lon, timestamp=None):
+        """Feed one fix; returns the events it caused (also delivered to listeners)."""
+        timestamp = time.time() if timestamp is None else timestamp
+        x, y = (float(v) for v in self.analyzer.to_local(lon, lat))
+
+        if self._anchor is None or np.hypot(x - self._anchor[0], y - self._anchor[1]) > self.neighbourhood / 2:
+            self._refresh_candidates(x, y)
+
+        events = []
+        if len(self._candidates):
+            pt = shapely.Point(x, y)
+            contained = shapely.contains_xy(self.analyzer.local_polygons[self._candidates], x, y)
+            outline_dist = shapely.distance(self.analyzer.tree.geometries[self._candidates], pt)
+
+            for idx, is_in, dist in zip(self._candidates.tolist(), contained.tolist(), outline_dist.tolist()):
+                if idx not in self.inside:
+                    if is_in and dist >= self.enter_margin:
+                        self.inside[idx] = timestamp
+                        events.append(self._event(ENTER, idx, timestamp, lat, lon))
+                elif not is_in and dist >= self.exit_margin:
+                    del self.inside[idx]
+                    self._dwelled.discard(idx)
+                    events.append(self._event(EXIT, idx, timestamp, lat, lon))
+                elif idx not in self._dwelled and timestamp - self.inside[idx] >= self.dwell_time:
+                    self._dwelled.add(idx)
+                    events.append(self._event(DWELL, idx, timestamp, lat, lon))
+
+        for event in events:
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"[Geofence] Listener error: {e}")
+        return events
+
+    def _event(self, kind, idx, timestamp, lat, lon):
+        return GeofenceEvent(kind, idx, self.analyzer.names[idx], timestamp, lat, lon)
+
+    def reset(self):
+        """Forget the current polygons, e.g. when the robot is relocated by hand."""
+        self.inside.clear()
+        self._dwelled.clear()
+        self._anchor = None
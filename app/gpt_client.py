@@ -1,54 +1,132 @@
+import threading
+from types import SimpleNamespace
+import httpx
 from openai import AzureOpenAI
 from app.utils import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, DEPLOYMENT_NAME
+from app.request_policy import GPT_POLICY
+
+TOOLS = [
+    {
+        "name": "navigate",
+        "description": "Navigate to a specific destination.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "destination": {
+                    "type": "string",
+                    "description": "The destination to navigate to."
+                }
+            },
+            "required": ["destination"]
+        }
+    },
+    {
+        "name": "current_location",
+        "description": "Analyze the current location. eg: 'where are we right now?'",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    }
+]
+
+# Events yielded by AzureGPT.stream_tool_response
+TEXT = "text"
+FUNCTION_CALL = "function_call"
+
+
+_http = None
+_client = None
+_client_lock = threading.Lock()
+
+
+def shared_client():
+    """One AzureOpenAI client (and keep-alive connection pool) for every AzureGPT."""
+    global _http, _client
+    with _client_lock:
+        if _client is None:
+            _http = httpx.Client(limits=httpx.Limits(max_connections=4, max_keepalive_connections=2))
+            _client = AzureOpenAI(
+                azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                api_key=AZURE_OPENAI_API_KEY,
+                api_version="2024-05-01-preview",
+                http_client=_http,
+                max_retries=0,  # retries and deadlines come from GPT_POLICY
+            )
+        return _client
+
+
+def prewarm():
+    """Open the connection to the OpenAI endpoint in the background."""
+    shared_client()
+
+    def warm():
+        try:
+            _http.head(AZURE_OPENAI_ENDPOINT, timeout=3.0)
+        except httpx.HTTPError as e:
+            print(f"[GPT Client] Pre-warm failed: {e}")
+
+    if AZURE_OPENAI_ENDPOINT:
+        threading.Thread(target=warm, daemon=True).start()
 
 
 class AzureGPT:
     def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=AZURE_OPENAI_ENDPOINT,
-            api_key=AZURE_OPENAI_API_KEY,
-            api_version="2024-05-01-preview",
-        )
+        self.client = shared_client()
 
     def get_tool_response(self, messages: list):
         """This function integrates tool calling."""
         try:
-            tools = [
-                {
-                    "name": "navigate",
-                    "description": "Navigate to a specific destination.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "destination": {
-                                "type": "string",
-                                "description": "The destination to navigate to."
-                            }
-                        },
-                        "required": ["destination"]
-                    }
-                },
-                {
-                    "name": "current_location",
-        "description": "Analyze the current location. eg: 'where are we right now?'",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": []
-                      }
-               }
-            ]
-
             # GPT call with function calling enabled
-            response = self.client.chat.completions.create(
+            response = GPT_POLICY.call(lambda timeout: self.client.chat.completions.create(
                 model="gpt-4o",  # Specify the correct model
                 messages=messages,
-                functions=tools,
-                function_call="auto"
-            )
+                functions=TOOLS,
+                function_call="auto",
+                timeout=timeout
+            ))
 
             return response
 
         except Exception as e:
             print(f"[GPT Client] Error: {e}")
-            return "Sorry, I couldn't process the request."
\ No newline at end of file
+            return "Sorry, I couldn't process the request."
+
+    def stream_tool_response(self, messages: list, stop_event=None):
+        """Streaming variant of get_tool_response.
+
+        Yields (TEXT, delta) as content arrives. A function call is assembled from its
+        deltas and yielded once as (FUNCTION_CALL, call) when the stream ends, where call
+        has .name and .arguments like a non-streamed message.function_call. The GPT_POLICY
+        deadline covers the wait for the stream to start; the same timeout then bounds each
+        read while it streams. The response is closed when the generator finishes or is
+        closed.
+        """
+        stream = GPT_POLICY.call(lambda timeout: self.client.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            functions=TOOLS,
+            function_call="auto",
+            stream=True,
+            timeout=timeout
+        ), stop_event=stop_event)
+
+        name, arguments = "", []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue  # Azure sends content-filter results as choice-less chunks
+                delta = chunk.choices[0].delta
+                if delta.function_call:
+                    name = delta.function_call.name or name
+                    arguments.append(delta.function_call.arguments or "")
+                elif delta.content:
+                    yield TEXT, delta.content
+        finally:
+            # Also runs when the caller drops the generator mid-stream (barge-in); without it
+            # the response keeps one of the pool's few connections checked out
+            stream.close()
+
+        if name:
+            yield FUNCTION_CALL, SimpleNamespace(name=name, arguments="".join(arguments))
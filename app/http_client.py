@@ -0,0 +1,97 @@
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from app.utils import STT_ENDPOINT, TTS_ENDPOINT
+
+MAPS_BASE_URL = "https://maps.googleapis.com"
+PREWARM_TIMEOUT = 3.0  # seconds; pre-warming is best effort
+
+# Connections kept per host. TTS gets more because pipelined synthesis overlaps requests.
+HOST_POOL_SIZES = {
+    STT_ENDPOINT: 2,
+    TTS_ENDPOINT: 4,
+    MAPS_BASE_URL: 2,
+}
+DEFAULT_POOL_SIZE = 2
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class HttpClient:
+    """One requests.Session shared by every cloud call in the process.
+
+    Each known host gets its own adapter and connection pool, and connections are kept alive
+    between calls, so only the first request to a host pays for TCP and TLS setup.
+    prewarm() opens those connections ahead of time, off the calling thread.
+    """
+
+    def __init__(self, host_pool_sizes=HOST_POOL_SIZES):
+        self.session = requests.Session()
+        self._adapters = {}
+        default = HTTPAdapter(pool_connections=8, pool_maxsize=DEFAULT_POOL_SIZE)
+        self.session.mount("https://", default)
+        self.session.mount("http://", default)
+        for url, size in host_pool_sizes.items():
+            self.mount_host(url, size)
+
+    def mount_host(self, url, pool_size):
+        """Give the host of `url` a dedicated pool of `pool_size` keep-alive connections."""
+        origin = _origin(url)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount(origin, adapter)
+        self._adapters[origin] = adapter
+        return adapter
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    def _warm(self, origin):
+        try:
+            # Any response will do; the point is the pooled connection it leaves behind
+            self.session.head(origin + "/", timeout=PREWARM_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"[HttpClient] Pre-warm of {origin} failed: {e}")
+
+    def prewarm(self, urls=None):
+        """Open a connection to each host in the background; returns the worker threads."""
+        origins = {_origin(url) for url in (urls or self._adapters)}
+        threads = [threading.Thread(target=self._warm, args=(origin,), daemon=True) for origin in origins]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def stats(self):
+        """Per-host pool figures: connections opened, requests served, idle connections."""
+        stats = {}
+        for adapter in {id(a): a for a in self.session.adapters.values()}.values():
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools[key]
+                stats[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                    "connections": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+                }
+        return stats
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client():
+    """Process-wide client, created on first use."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
@@ -0,0 +1,132 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+
+LANDMARKS_FILE = "campus_landmarks.json"
+MATCH_THRESHOLD = 0.75  # token overlap needed for a landmark that isn't named exactly
+MATCH_MARGIN = 0.15  # lead over the runner-up needed for that match to count
+MIN_CONFIDENCE = 0.5  # below this a navigate intent goes to GPT instead (e.g. 1 word of a 3-word name)
+
+# Words that don't tell landmarks apart
+_FILLER = {"the", "a", "an", "of", "to", "please", "building", "block", "side", "area", "our", "campus"}
+
+# Matched against the whole utterance, so "where are we going next" still goes to GPT
+_LOCATION_PATTERNS = [
+    r"where (are|am) (we|i)",
+    r"where is this( place)?",
+    r"(what|which) (place|building|location) is (this|it)",
+    r"(can you |could you )?(please )?tell (me|us) where (we are|i am)",
+    r"(can you |could you )?(please )?(tell me )?(our|my) (current )?(location|position)",
+    r"(what|where) is (our|my) (current )?(location|position)",
+]
+_LOCATION_TAIL = r"( right now| now)?( please)?"
+
+_NAVIGATE_PATTERNS = [
+    r"^(can you |could you |would you |please )*(take|bring|guide|lead|walk|escort) (me|us)( to| towards| over to)? (?P<dest>.+)$",
+    r"^(can you |could you |please )*(navigate|go|head|drive) (to|towards) (?P<dest>.+)$",
+    r"^(let's|lets|let us) (go|head|walk) (to|towards) (?P<dest>.+)$",
+    r"^(i|we) (want|would like|wanna) to (go|get) to (?P<dest>.+)$",
+    r"^(show) (me|us) the way to (?P<dest>.+)$",
+]
+
+# The pre-roll can put the tail of the wake word (or a filler) in front of the command
+_LEADING_FILLER = re.compile(r"^((hey|hi|hello|ok|okay|hellum|helium|so|um|uh|er) )+")
+
+
+def normalize(text):
+    text = re.sub(r"[^a-z0-9' ]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _tokens(text):
+    return {token for token in text.split() if token not in _FILLER}
+
+
+@dataclass
+class Intent:
+    """A tool call decided locally; shaped like a GPT function_call (name, arguments)."""
+    name: str
+    arguments: dict = field(default_factory=dict)
+    confidence: float = 1.0
+
+
+class IntentRouter:
+    """Compiled pattern matcher for the commands that map straight onto a tool.
+
+    route(text) returns an Intent when the transcript is clearly a "where are we" question
+    or a request to go to a known landmark, and None otherwise (including for destinations
+    it doesn't recognise, or matches with less than MIN_CONFIDENCE), in which case the
+    caller falls back to GPT.
+    """
+
+    def __init__(self, landmark_names):
+        self.landmarks = {}  # normalized name -> canonical name
+        for name in landmark_names:
+            if normalize(name):
+                self.landmarks.setdefault(normalize(name), name)
+        self._landmark_tokens = {key: _tokens(key) for key in self.landmarks}
+
+        self._location = re.compile(r"^(%s)%s$" % ("|".join(_LOCATION_PATTERNS), _LOCATION_TAIL))
+        self._navigate = [re.compile(pattern) for pattern in _NAVIGATE_PATTERNS]
+        # Longest first, so "csit front entrance" wins over "csit front"
+        names = sorted(self.landmarks, key=len, reverse=True)
+        self._exact = re.compile(r"^(the )?(%s)( please)?$" % "|".join(map(re.escape, names))) if names else None
+
+    @classmethod
+    def from_sources(cls, map_names, landmarks_path=LANDMARKS_FILE):
+        """Landmarks from the map (e.g. GeoPolygonAnalyzer.names) plus the campus_landmarks.json tour stops."""
+        names = list(map_names)
+        if os.path.exists(landmarks_path):
+            try:
+                with open(landmarks_path) as f:
+                    names.extend(json.load(f).keys())
+            except (OSError, ValueError) as e:
+                print(f"[IntentRouter] Could not read {landmarks_path}: {e}")
+        return cls(names)
+
+    def match_landmark(self, phrase):
+        """(canonical name, confidence) for a spoken destination, or (None, 0.0)."""
+        phrase = normalize(phrase)
+        if self._exact is not None:
+            exact = self._exact.match(phrase)
+            if exact:
+                return self.landmarks[exact.group(2)], 1.0
+
+        spoken = _tokens(phrase)
+        if not spoken:
+            return None, 0.0
+        scores = sorted(
+            ((len(spoken & tokens) / len(spoken | tokens), key) for key, tokens in self._landmark_tokens.items()
+             if tokens),
+            reverse=True
+        )
+        if not scores:
+            return None, 0.0
+        best, key = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        if best >= MATCH_THRESHOLD and best - runner_up >= MATCH_MARGIN:
+            return self.landmarks[key], best
+
+        # A partial name ("the library") is fine if only one landmark contains it
+        containing = [key for key, tokens in self._landmark_tokens.items() if spoken <= tokens]
+        if len(containing) == 1:
+            key = containing[0]
+            return self.landmarks[key], len(spoken) / len(self._landmark_tokens[key])
+        return None, best
+
+    def route(self, text):
+        phrase = _LEADING_FILLER.sub("", normalize(text))
+        if not phrase:
+            return None
+        if self._location.match(phrase):
+            return Intent("current_location")
+
+        for pattern in self._navigate:
+            match = pattern.match(phrase)
+            if match:
+                name, confidence = self.match_landmark(match.group("dest"))
+                if name and confidence >= MIN_CONFIDENCE:
+                    return Intent("navigate", {"destination": name}, confidence)
+                return None
+        return None
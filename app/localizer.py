@@ -1,42 +1,92 @@
-import json
 import random
 import math
-from shapely.geometry import shape, Point
+import numpy as np
+import shapely
+from shapely.geometry import Point
 from shapely.ops import nearest_points
+from shapely.strtree import STRtree
 import matplotlib.pyplot as plt
+from app.map_cache import load_map
+from app.map_grid import load_grid
 import asyncio
 
+EARTH_RADIUS = 6371000  # metres
+
+
 class GeoPolygonAnalyzer:
-    def __init__(self, geojson_path, distance_threshold=100, min_neighbors=3):
+    def __init__(self, geojson_path, distance_threshold=100, min_neighbors=3, use_grid=True):
         self.geojson_path = geojson_path
-        self.distance_threshold = distance_threshold
-        self.min_neighbors = min_neighbors
+        self.distance_threshold = distance_threshold  # metres, radius for neighbour queries
+        self.min_neighbors = min_neighbors  # neighbour queries never return fewer than this
         self.current_localization = None
         self.current_point = None
         self.polygons = []
         self.descriptions = []
         self.names = []
         self.bounds = None
+        self.origin = None
+        self.local_polygons = None
+        self.local_bounds = None
+        self.tree = None
+        self.area_tree = None
+        self.areas = None
+        self.grid = None
         self._load_geojson()
+        if use_grid:
+            self.grid = load_grid(geojson_path)
     
     def _load_geojson(self):
-        with open(self.geojson_path) as f:
-            data = json.load(f)
-
-        for feature in data["features"]:
-            print(feature)
-            
-            if feature["geometry"]["type"] == "Polygon":
-                self.polygons.append(shape(feature["geometry"]))
-                self.names.append(feature["properties"].get("name", "Unnamed"))
-                self.descriptions.append(feature["properties"].get("description", "No description available"))
-        
-        minx, miny, maxx, maxy = self.polygons[0].bounds
-        for poly in self.polygons:
-            x1, y1, x2, y2 = poly.bounds
-            minx, miny = min(minx, x1), min(miny, y1)
-            maxx, maxy = max(maxx, x2), max(maxy, y2)
-        self.bounds = (minx, miny, maxx, maxy)
+        # Served from the compiled artifact next to the map; descriptions stay on disk until read
+        compiled = load_map(self.geojson_path)
+        self.polygons = list(compiled.polygons)
+        self.names = compiled.names
+        self.descriptions = compiled.descriptions
+
+        minx, miny = compiled.coords.min(axis=0)
+        maxx, maxy = compiled.coords.max(axis=0)
+        self.bounds = (float(minx), float(miny), float(maxx), float(maxy))
+
+        self._setup_projection()
+        self.local_polygons = shapely.transform(compiled.polygons, self._transform_coords)
+        self.local_bounds = tuple(float(v) for v in shapely.total_bounds(self.local_polygons))
+
+        # Distances are measured to the outline, so index the outlines rather than the areas
+        self.tree = STRtree(shapely.boundary(self.local_polygons))
+
+        # Inside tests: bounding-box prefilter over the areas, then prepared geometries
+        shapely.prepare(self.local_polygons)
+        self.area_tree = STRtree(self.local_polygons)
+        self.areas = shapely.area(self.local_polygons)
+
+    def _setup_projection(self):
+        """Local east/north tangent plane (metres) centred on the map."""
+        minx, miny, maxx, maxy = self.bounds
+        self.origin = ((minx + maxx) / 2, (miny + maxy) / 2)
+        metres_per_degree = math.radians(1) * EARTH_RADIUS
+        self._east_scale = metres_per_degree * math.cos(math.radians(self.origin[1]))
+        self._north_scale = metres_per_degree
+
+    def to_local(self, lons, lats):
+        """Project lon/lat (scalars or arrays) to east/north metres from the map origin."""
+        return (
+            (np.asarray(lons, dtype=float) - self.origin[0]) * self._east_scale,
+            (np.asarray(lats, dtype=float) - self.origin[1]) * self._north_scale
+        )
+
+    def to_geographic(self, easts, norths):
+        """Inverse of to_local."""
+        return (
+            np.asarray(easts, dtype=float) / self._east_scale + self.origin[0],
+            np.asarray(norths, dtype=float) / self._north_scale + self.origin[1]
+        )
+
+    def project(self, pt):
+        """Project a lon/lat Point into the local metric frame."""
+        x, y = self.to_local(pt.x, pt.y)
+        return Point(float(x), float(y))
+
+    def _transform_coords(self, coords):
+        return np.column_stack(self.to_local(coords[:, 0], coords[:, 1]))
               
     def get_direction(self, from_point, to_point):
         dx = to_point.x - from_point.x
@@ -51,26 +101,137 @@ class GeoPolygonAnalyzer:
         else:
             return "East"
 
-    def analyze_point(self, pt):
-        all_dists = [
-            (
-                pt.distance((nearest_pt := nearest_points(poly.boundary, pt)[0])) * 111139,  
-                name,
-                description,
-                nearest_pt,  
-                self.get_direction(nearest_pt, pt),  
-                idx 
-            )
-            for idx, (name, description, poly) in enumerate(zip(self.names, self.descriptions, self.polygons))
-        ]
-    
-        nearest_two = sorted(all_dists, key=lambda x: x[0])[:2]
-        return nearest_two
+    def query_radius(self, pt, radius=None):
+        """Return (distance_m, idx) pairs for polygons within radius metres, nearest first.
+
+        Like the other query_* helpers, pt is already in the local frame (see project).
+        """
+        radius = self.distance_threshold if radius is None else radius
+        candidates = self.tree.query(pt, predicate="dwithin", distance=radius)
+        return self._sorted_hits(pt, candidates)
+
+    def query_nearest(self, pt, k=2):
+        """Return the k nearest (distance_m, idx) pairs, nearest first.
+
+        The search radius starts at the nearest outline and doubles until k candidates
+        are inside it, so only the polygons around the point are ever measured.
+        """
+        k = min(k, len(self.polygons))
+        if k <= 0:
+            return []
+
+        nearest_idx, nearest_dist = self.tree.query_nearest(pt, return_distance=True)
+        if k == 1:
+            return [(float(nearest_dist[0]), int(nearest_idx[0]))]
+
+        radius = max(float(nearest_dist[0]), 1.0)
+        while True:
+            candidates = self.tree.query(pt, predicate="dwithin", distance=radius)
+            if len(candidates) >= k:
+                return self._sorted_hits(pt, candidates)[:k]
+            radius *= 2
+
+    def find_neighbors(self, pt):
+        """Polygons within distance_threshold, topped up to min_neighbors with the nearest ones."""
+        hits = self.query_radius(pt)
+        if len(hits) < self.min_neighbors:
+            hits = self.query_nearest(pt, self.min_neighbors)
+        return hits
+
+    def _sorted_hits(self, pt, candidates):
+        dists = shapely.distance(self.tree.geometries.take(candidates), pt)
+        order = np.argsort(dists, kind="stable")
+        return [(float(dists[i]), int(candidates[i])) for i in order]
+
+    def find_inside(self, pt):
+        """Index of the polygon containing a local point, or None.
+
+        Overlapping footprints resolve to the smallest, i.e. most specific, polygon.
+        """
+        candidates = self.area_tree.query(pt)
+        if len(candidates):
+            hits = candidates[shapely.contains_xy(self.local_polygons[candidates], pt.x, pt.y)]
+            if len(hits):
+                return int(hits[np.argmin(self.areas[hits])])
+        return None
+
+    def _describe(self, pt, idx):
+        nearest_pt = nearest_points(self.tree.geometries[idx], pt)[0]
+        return (
+            pt.distance(nearest_pt),
+            self.names[idx],
+            self.descriptions[idx],
+            nearest_pt,
+            self.get_direction(nearest_pt, pt),
+            idx
+        )
+
+    def analyze_point(self, pt, k=2):
+        """Nearest k buildings to a lon/lat Point; nearest points are in the local frame.
+
+        Inside a footprint, that building alone is returned with distance 0 and direction
+        "Inside", without measuring any outlines.
+        """
+        pt = self.project(pt)
+        inside = self.find_inside(pt)
+        if inside is not None:
+            return [(0.0, self.names[inside], self.descriptions[inside], pt, "Inside", inside)]
+        return [self._describe(pt, idx) for _, idx in self.query_nearest(pt, k)]
+
+    def analyze_neighbors(self, pt):
+        pt = self.project(pt)
+        return [self._describe(pt, idx) for _, idx in self.find_neighbors(pt)]
+
+    def locate(self, lat, lon):
+        """(idx, distance_m, inside) for a single fix; distance_m is to that building's outline.
+
+        Uses the precomputed lookup grid when one is available (a cell lookup plus an exact
+        refinement against the cell's candidates, no shapely calls) and the STR-tree otherwise.
+        """
+        x = (lon - self.origin[0]) * self._east_scale
+        y = (lat - self.origin[1]) * self._north_scale
+        if self.grid is not None:
+            hit = self.grid.lookup(x, y)
+            if hit is not None:
+                return hit
+
+        pt = Point(x, y)
+        inside = self.find_inside(pt)
+        if inside is not None:
+            return inside, float(self.tree.geometries[inside].distance(pt)), True
+        (dist, idx), = self.query_nearest(pt, 1)
+        return idx, dist, False
+
+    def analyze_points(self, lats, lons):
+        """Nearest building for a whole track of fixes in one vectorized pass.
+
+        Returns (indices, distances_m, bearings) arrays aligned with the input, where the
+        bearing (degrees clockwise from north) points from the nearest outline to the fix.
+        """
+        pts = shapely.points(*self.to_local(lons, lats))
+
+        (input_idx, tree_idx), dists = self.tree.query_nearest(pts, return_distance=True, all_matches=False)
+
+        indices = np.full(len(pts), -1, dtype=np.int64)
+        distances = np.full(len(pts), np.nan)
+        bearings = np.full(len(pts), np.nan)
+        indices[input_idx] = tree_idx
+        distances[input_idx] = dists
+
+        # Each shortest line runs from the outline to the fix
+        lines = shapely.shortest_line(self.tree.geometries.take(tree_idx), pts[input_idx])
+        ends = shapely.get_coordinates(lines).reshape(-1, 2, 2)
+        dx = ends[:, 1, 0] - ends[:, 0, 0]
+        dy = ends[:, 1, 1] - ends[:, 0, 1]
+        bearings[input_idx] = np.degrees(np.arctan2(dx, dy)) % 360
+
+        return indices, distances, bearings
 
     def plot_analysis(self, pt: Point, analysis_results):
-        minx, miny, maxx, maxy = self.bounds
+        minx, miny, maxx, maxy = self.local_bounds
+        pt = self.project(pt)
         fig, ax = plt.subplots(figsize=(10, 10))
-        for poly in self.polygons:
+        for poly in self.local_polygons:
             x, y = poly.exterior.xy
             ax.plot(x, y, color="black", linewidth=1)
 
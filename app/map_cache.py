@@ -0,0 +1,247 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+import shapely
+from shapely.errors import GEOSException
+from shapely.geometry import shape
+
+MAGIC = b"HMAPC\x00\x00\x01"
+FORMAT_VERSION = 1
+CACHE_SUFFIX = ".mapc"
+_ALIGN = 8
+
+
+def default_cache_path(geojson_path):
+    """Compiled artifacts live next to the map, e.g. gjson.json -> gjson.mapc"""
+    return os.path.splitext(geojson_path)[0] + CACHE_SUFFIX
+
+
+def source_fingerprint(path, with_hash=True):
+    """mtime/size of the source file, plus its SHA-256 when requested."""
+    st = os.stat(path)
+    fingerprint = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    if with_hash:
+        with open(path, "rb") as f:
+            fingerprint["sha256"] = hashlib.sha256(f.read()).hexdigest()
+    return fingerprint
+
+
+def is_fresh(meta, source_path, cache_path=None):
+    """A cache is fresh if the source mtime/size are unchanged, or failing that, its hash is.
+
+    When only the hash matches (the map was touched or copied), the new mtime/size are
+    written back to `cache_path` so the next start doesn't hash the source again.
+    """
+    recorded = meta.get("source", {})
+    try:
+        current = source_fingerprint(source_path, with_hash=False)
+    except OSError:
+        return False
+    if current["mtime_ns"] == recorded.get("mtime_ns") and current["size"] == recorded.get("size"):
+        return True
+    current = source_fingerprint(source_path)
+    if current["sha256"] != recorded.get("sha256"):
+        return False
+    if cache_path is not None:
+        try:
+            _record_source(cache_path, current)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[MapCache] Could not update source fingerprint in {cache_path}: {e}")
+    return True
+
+
+def _record_source(cache_path, fingerprint):
+    """Rewrite an artifact with a new source fingerprint, keeping its sections as they are."""
+    meta, arrays = read_sections(cache_path)
+    meta = {key: value for key, value in meta.items() if key not in ("version", "sections")}
+    write_sections(cache_path, dict(meta, source=fingerprint), arrays)
+
+
+def write_sections(path, meta, sections):
+    """Write named numpy arrays as 8-byte aligned raw sections behind a JSON header.
+
+    The file is written to a temporary name and renamed, so readers never see a partial file.
+    """
+    layout = {}
+    offset = 0
+    blobs = []
+    for name, array in sections.items():
+        array = np.ascontiguousarray(array)
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        blobs.append(array.tobytes())
+        offset += len(blobs[-1])
+        offset += -offset % _ALIGN
+
+    header = json.dumps(dict(meta, version=FORMAT_VERSION, sections=layout)).encode("utf-8")
+    data_start = len(MAGIC) + 4 + len(header)
+    data_start += -data_start % _ALIGN
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - f.tell()))
+        for blob in blobs:
+            f.write(blob)
+            f.write(b"\0" * (-len(blob) % _ALIGN))
+    os.replace(tmp_path, path)
+
+
+def read_sections(path):
+    """Memory-map a file written by write_sections and return (meta, {name: array view})."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mm[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a compiled map artifact")
+    (header_len,) = struct.unpack_from("<I", mm, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    meta = json.loads(mm[header_start:header_start + header_len].decode("utf-8"))
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {meta.get('version')}, expected {FORMAT_VERSION}")
+
+    data_start = header_start + header_len
+    data_start += -data_start % _ALIGN
+    arrays = {}
+    for name, section in meta["sections"].items():
+        dtype = np.dtype(section["dtype"])
+        count = int(np.prod(section["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            mm, dtype=dtype, count=count, offset=data_start + section["offset"]
+        ).reshape(section["shape"])
+    return meta, arrays
+
+
+def _pack_blobs(blobs):
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in blobs])
+    return offsets, np.frombuffer(b"".join(blobs), dtype=np.uint8)
+
+
+def _pack_strings(strings):
+    return _pack_blobs([s.encode("utf-8") for s in strings])
+
+
+class StringTable:
+    """Offset-indexed strings backed by the mapped artifact; decoded on access only."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("string table index out of range")
+        return self._blob[self._offsets[idx]:self._offsets[idx + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+class CompiledMap:
+    """Polygons, names and descriptions of a map, either from the artifact or the GeoJSON."""
+
+    def __init__(self, polygons, names, descriptions, coords, coord_offsets):
+        self.polygons = polygons
+        self.names = names
+        self.descriptions = descriptions
+        self.coords = coords  # every vertex as (lon, lat), grouped per polygon
+        self.coord_offsets = coord_offsets  # coords[coord_offsets[i]:coord_offsets[i + 1]] is polygon i
+
+
+def parse_geojson(geojson_path):
+    """Read the Polygon features of a GeoJSON map into a CompiledMap."""
+    with open(geojson_path) as f:
+        data = json.load(f)
+
+    polygons, names, descriptions = [], [], []
+    for feature in data["features"]:
+        if feature["geometry"]["type"] == "Polygon":
+            polygons.append(shape(feature["geometry"]))
+            names.append(feature["properties"].get("name", "Unnamed"))
+            descriptions.append(feature["properties"].get("description", "No description available"))
+
+    polygons = np.asarray(polygons, dtype=object)
+    coords, owners = shapely.get_coordinates(polygons, return_index=True)
+    coord_offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+    coord_offsets[1:] = np.cumsum(np.bincount(owners, minlength=len(polygons)))
+    return CompiledMap(polygons, names, descriptions, coords, coord_offsets)
+
+
+def compile_map(geojson_path, cache_path=None, parsed=None):
+    """Write the binary artifact for a GeoJSON map and return its path."""
+    cache_path = cache_path or default_cache_path(geojson_path)
+    parsed = parsed or parse_geojson(geojson_path)
+
+    wkb_offsets, wkb_blob = _pack_blobs(list(shapely.to_wkb(parsed.polygons)))
+    name_offsets, name_blob = _pack_strings(parsed.names)
+    desc_offsets, desc_blob = _pack_strings(parsed.descriptions)
+
+    write_sections(cache_path, {"source": source_fingerprint(geojson_path), "count": len(parsed.polygons)}, {
+        "wkb_offsets": wkb_offsets,
+        "wkb": wkb_blob,
+        "coords": np.asarray(parsed.coords, dtype=np.float64),
+        "coord_offsets": parsed.coord_offsets,
+        "name_offsets": name_offsets,
+        "names": name_blob,
+        "desc_offsets": desc_offsets,
+        "descriptions": desc_blob,
+    })
+    return cache_path
+
+
+def load_compiled(cache_path):
+    """Memory-map a compiled artifact. Returns (meta, CompiledMap)."""
+    meta, arrays = read_sections(cache_path)
+    wkb_offsets, wkb_blob = arrays["wkb_offsets"], arrays["wkb"]
+    wkb = [wkb_blob[wkb_offsets[i]:wkb_offsets[i + 1]].tobytes() for i in range(meta["count"])]
+    name_table = StringTable(arrays["name_offsets"], arrays["names"])
+    return meta, CompiledMap(
+        polygons=shapely.from_wkb(wkb),
+        names=list(name_table),
+        descriptions=StringTable(arrays["desc_offsets"], arrays["descriptions"]),
+        coords=arrays["coords"],
+        coord_offsets=arrays["coord_offsets"]
+    )
+
+
+def load_map(geojson_path, cache_path=None):
+    """Load a map from its compiled artifact, recompiling from the GeoJSON when stale.
+
+    If the artifact cannot be written (e.g. read-only storage) the parsed GeoJSON is used directly.
+    """
+    cache_path = cache_path or default_cache_path(geojson_path)
+    if os.path.exists(cache_path):
+        try:
+            meta, compiled = load_compiled(cache_path)
+            if is_fresh(meta, geojson_path, cache_path):
+                return compiled
+        except (OSError, ValueError, KeyError, GEOSException) as e:  # GEOSException: corrupt WKB
+            print(f"[MapCache] Ignoring unreadable map cache {cache_path}: {e}")
+
+    parsed = parse_geojson(geojson_path)
+    try:
+        compile_map(geojson_path, cache_path, parsed=parsed)
+        return load_compiled(cache_path)[1]
+    except (OSError, ValueError) as e:
+        print(f"[MapCache] Could not write map cache {cache_path}: {e}")
+        return parsed
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "gjson.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else None
+    print(f"Compiled {source} -> {compile_map(source, target)}")
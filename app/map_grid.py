@@ -0,0 +1,236 @@
+import argparse
+import math
+import os
+import numpy as np
+import shapely
+from app.map_cache import CACHE_SUFFIX, is_fresh, read_sections, source_fingerprint, write_sections
+
+GRID_SUFFIX = ".grid" + CACHE_SUFFIX
+DEFAULT_CELL_SIZE = 1.0  # metres
+NO_POLYGON = -1
+GRID_LAYOUT = 2  # bumped when the sections change; older grids count as stale
+
+
+def default_grid_path(geojson_path):
+    """The lookup grid lives next to the map, e.g. gjson.json -> gjson.grid.mapc"""
+    return os.path.splitext(geojson_path)[0] + GRID_SUFFIX
+
+
+def _outline_segments(local_polygons):
+    """Every ring edge of every polygon as start/end arrays with per-polygon offsets."""
+    starts, ends = [], []
+    offsets = np.zeros(len(local_polygons) + 1, dtype=np.int64)
+    for i, poly in enumerate(local_polygons):
+        count = 0
+        for ring in [poly.exterior, *poly.interiors]:
+            coords = np.asarray(ring.coords)
+            starts.append(coords[:-1])
+            ends.append(coords[1:])
+            count += len(coords) - 1
+        offsets[i + 1] = offsets[i] + count
+    return np.concatenate(starts), np.concatenate(ends), offsets
+
+
+def _two_nearest(tree, centers, start_radius):
+    """Indices of the two nearest outlines to each center, via an expanding dwithin search."""
+    outlines = tree.geometries
+    wanted = min(2, len(outlines))
+    nearest = np.full((len(centers), 2), NO_POLYGON, dtype=np.int32)
+    pending = np.arange(len(centers))
+    radius = start_radius
+    while pending.size:
+        point_idx, outline_idx = tree.query(centers[pending], predicate="dwithin", distance=radius)
+        done = np.bincount(point_idx, minlength=len(pending)) >= wanted
+
+        keep = done[point_idx]
+        point_idx, outline_idx = point_idx[keep], outline_idx[keep]
+        dists = shapely.distance(outlines[outline_idx], centers[pending][point_idx])
+        order = np.lexsort((dists, point_idx))
+        point_idx, outline_idx = point_idx[order], outline_idx[order]
+        _, first = np.unique(point_idx, return_index=True)
+        nearest[pending[point_idx[first]], 0] = outline_idx[first]
+        if wanted == 2:
+            nearest[pending[point_idx[first + 1]], 1] = outline_idx[first + 1]
+
+        pending = pending[~done]
+        radius *= 2
+    return nearest
+
+
+def build_grid(analyzer, grid_path=None, cell_size=DEFAULT_CELL_SIZE):
+    """Precompute the lookup grid for an analyzer's map and write it next to the map.
+
+    Each cell stores the smallest polygon containing its centre (or -1) and the two outlines
+    nearest to its centre. Cells crossed by an outline also get every polygon touching the
+    cell, smallest first, for an exact inside test that resolves overlaps like find_inside.
+    """
+    grid_path = grid_path or default_grid_path(analyzer.geojson_path)
+    minx, miny, maxx, maxy = analyzer.local_bounds
+    nx = max(1, math.ceil((maxx - minx) / cell_size))
+    ny = max(1, math.ceil((maxy - miny) / cell_size))
+
+    xs = minx + (np.arange(nx) + 0.5) * cell_size
+    ys = miny + (np.arange(ny) + 0.5) * cell_size
+    cx, cy = np.meshgrid(xs, ys)
+    centers = shapely.points(cx.ravel(), cy.ravel())
+
+    cells = np.full((ny * nx, 3), NO_POLYGON, dtype=np.int32)
+    point_idx, poly_idx = analyzer.area_tree.query(centers, predicate="within")
+    # Where footprints overlap the smallest polygon is written last and wins
+    order = np.argsort(-analyzer.areas[poly_idx], kind="stable")
+    cells[point_idx[order], 0] = poly_idx[order]
+    cells[:, 1:] = _two_nearest(analyzer.tree, centers, cell_size)
+
+    boxes = shapely.box(cx.ravel() - cell_size / 2, cy.ravel() - cell_size / 2,
+                        cx.ravel() + cell_size / 2, cy.ravel() + cell_size / 2)
+    mixed = np.zeros(ny * nx, dtype=bool)
+    mixed[np.unique(analyzer.tree.query(boxes, predicate="intersects")[0])] = True
+
+    # Any polygon containing a point of a mixed cell intersects the cell's box
+    mixed_idx = np.flatnonzero(mixed)
+    box_idx, poly_idx = analyzer.area_tree.query(boxes[mixed_idx], predicate="intersects")
+    order = np.lexsort((analyzer.areas[poly_idx], box_idx))
+    box_idx, poly_idx = box_idx[order], poly_idx[order]
+    counts = np.zeros(ny * nx, dtype=np.int64)
+    counts[mixed_idx] = np.bincount(box_idx, minlength=len(mixed_idx))
+    candidate_offsets = np.zeros(ny * nx + 1, dtype=np.int64)
+    np.cumsum(counts, out=candidate_offsets[1:])
+
+    seg_starts, seg_ends, seg_offsets = _outline_segments(analyzer.local_polygons)
+    meta = {
+        "source": source_fingerprint(analyzer.geojson_path),
+        "origin": list(analyzer.origin),
+        "grid_origin": [minx, miny],
+        "cell_size": cell_size,
+        "layout": GRID_LAYOUT,
+    }
+    write_sections(grid_path, meta, {
+        "cells": cells.reshape(ny, nx, 3),
+        "candidate_offsets": candidate_offsets,
+        "candidates": poly_idx.astype(np.int32),
+        "seg_starts": seg_starts,
+        "seg_ends": seg_ends,
+        "seg_offsets": seg_offsets,
+        "areas": np.asarray(analyzer.areas, dtype=np.float64),
+    })
+    return grid_path
+
+
+class RasterLookup:
+    """O(1) nearest-building lookup from a memory-mapped grid, refined in plain Python.
+
+    Distances are exact for the chosen building; the choice itself is exact unless the true
+    nearest outline is not among the two stored for the cell, in which case the reported
+    distance is still within one cell diagonal of the true nearest distance.
+    """
+
+    def __init__(self, grid_path):
+        meta, arrays = read_sections(grid_path)
+        if meta.get("layout") != GRID_LAYOUT:
+            raise ValueError("built by an older version, rebuild it with python -m app.map_grid")
+        self.meta = meta
+        self.origin = tuple(meta["origin"])
+        self.x0, self.y0 = meta["grid_origin"]
+        self.cell_size = meta["cell_size"]
+        self.cells = arrays["cells"]
+        self.candidate_offsets = arrays["candidate_offsets"]
+        self.candidates = arrays["candidates"]
+        self.seg_starts = arrays["seg_starts"]
+        self.seg_ends = arrays["seg_ends"]
+        self.seg_offsets = arrays["seg_offsets"]
+        self.areas = arrays["areas"].tolist()
+        self._segment_cache = {}
+
+    def _segments(self, idx):
+        """Edges of polygon idx as (ax, ay, bx, by) tuples, converted once and kept."""
+        segments = self._segment_cache.get(idx)
+        if segments is None:
+            start, end = self.seg_offsets[idx], self.seg_offsets[idx + 1]
+            segments = [
+                (ax, ay, bx, by)
+                for (ax, ay), (bx, by) in zip(self.seg_starts[start:end].tolist(), self.seg_ends[start:end].tolist())
+            ]
+            self._segment_cache[idx] = segments
+        return segments
+
+    def outline_distance(self, idx, x, y):
+        """Exact distance (m) from a local point to polygon idx's outline."""
+        best = math.inf
+        for ax, ay, bx, by in self._segments(idx):
+            dx, dy = bx - ax, by - ay
+            px, py = x - ax, y - ay
+            length_sq = dx * dx + dy * dy
+            t = (px * dx + py * dy) / length_sq if length_sq else 0.0
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            ox, oy = px - t * dx, py - t * dy
+            dist_sq = ox * ox + oy * oy
+            if dist_sq < best:
+                best = dist_sq
+        return math.sqrt(best)
+
+    def contains(self, idx, x, y):
+        """Even-odd ray cast against polygon idx (holes included)."""
+        inside = False
+        for ax, ay, bx, by in self._segments(idx):
+            if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+                inside = not inside
+        return inside
+
+    def lookup(self, x, y):
+        """(idx, distance_m, inside) for a local point, or None when it falls outside the grid."""
+        col = int((x - self.x0) // self.cell_size)
+        row = int((y - self.y0) // self.cell_size)
+        if not (0 <= row < self.cells.shape[0] and 0 <= col < self.cells.shape[1]):
+            return None
+
+        inside_id, first, second = self.cells[row, col].tolist()
+        cell = row * self.cells.shape[1] + col
+        start, end = self.candidate_offsets[cell:cell + 2].tolist()
+        if end > start:
+            # An outline crosses this cell: the first candidate (smallest) containing the point wins
+            inside_id = NO_POLYGON
+            for idx in self.candidates[start:end].tolist():
+                if self.contains(idx, x, y):
+                    inside_id = idx
+                    break
+        if inside_id != NO_POLYGON:
+            return inside_id, self.outline_distance(inside_id, x, y), True
+
+        best = (first, self.outline_distance(first, x, y))
+        if second != NO_POLYGON:
+            dist = self.outline_distance(second, x, y)
+            if dist < best[1]:
+                best = (second, dist)
+        return best[0], best[1], False
+
+
+def load_grid(geojson_path, grid_path=None):
+    """Load the grid for a map, or None when it is missing or stale."""
+    grid_path = grid_path or default_grid_path(geojson_path)
+    if not os.path.exists(grid_path):
+        return None
+    try:
+        grid = RasterLookup(grid_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[MapGrid] Ignoring unreadable grid {grid_path}: {e}")
+        return None
+    if not is_fresh(grid.meta, geojson_path, grid_path):
+        print(f"[MapGrid] {grid_path} is stale, rebuild it with: python -m app.map_grid {geojson_path}")
+        return None
+    return grid
+
+
+if __name__ == "__main__":
+    from app.localizer import GeoPolygonAnalyzer
+
+    parser = argparse.ArgumentParser(description="Precompute the nearest-building lookup grid for a map")
+    parser.add_argument("geojson", nargs="?", default="gjson.json")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="cell edge in metres")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    path = build_grid(GeoPolygonAnalyzer(args.geojson), args.out, args.cell_size)
+    print(f"Wrote lookup grid {path}")
@@ -1,4 +1,5 @@
-import requests
+from app.http_client import get_http_client
+from app.request_policy import MAPS_POLICY
 import math
 from typing import Tuple, List, Union
 import polyline  # Make sure to install: pip install polyline
@@ -16,7 +17,7 @@ def geocode_address(api_key: str, address: str) -> Union[Tuple[float, float], No
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = MAPS_POLICY.call(lambda timeout: get_http_client().get(url, params=params, timeout=timeout))
         data = response.json()
 
         if data["status"] != "OK":
@@ -55,7 +56,7 @@ def get_waypoints(api_key: str, start_location: Tuple[float, float], end_locatio
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = MAPS_POLICY.call(lambda timeout: get_http_client().get(url, params=params, timeout=timeout))
         data = response.json()
 
         if data["status"] != "OK":
@@ -0,0 +1,128 @@
+import threading
+import numpy as np
+from pvrecorder import PvRecorder
+
+SAMPLE_RATE = 16000  # PvRecorder always captures 16 kHz mono int16
+DEFAULT_CAPACITY_SECONDS = 10
+MAX_READ_SAMPLES = 4096  # reads up to this size are always contiguous views
+
+
+class MicRingBuffer:
+    """One microphone capture thread feeding any number of readers.
+
+    Samples go into a preallocated int16 ring. The first MAX_READ_SAMPLES samples are
+    mirrored past the end of the ring, so every read of up to that size is a contiguous
+    numpy view into it rather than a copy. Positions are absolute sample counts since
+    start(), which lets a reader begin in the past (pre-roll) as long as it is still in
+    the ring.
+    """
+
+    def __init__(self, frame_length=512, device_index=-1, capacity_seconds=DEFAULT_CAPACITY_SECONDS):
+        self.frame_length = frame_length
+        self.device_index = device_index
+        self.capacity = int(capacity_seconds * SAMPLE_RATE)
+        self._ring = np.zeros(self.capacity + MAX_READ_SAMPLES, dtype=np.int16)
+        self._write_pos = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._closed = False
+        self._thread = None
+        self.recorder = None
+
+    @property
+    def position(self):
+        """Absolute index of the next sample to be captured."""
+        return self._write_pos
+
+    def start(self):
+        self.recorder = PvRecorder(frame_length=self.frame_length, device_index=self.device_index)
+        self.recorder.start()
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._closed = True
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=1)
+        if self.recorder:
+            try:
+                self.recorder.stop()
+                self.recorder.delete()
+            except Exception as e:
+                print(f"Error stopping recorder: {e}")
+            self.recorder = None
+
+    def _capture_loop(self):
+        while self._running:
+            try:
+                frame = self.recorder.read()
+            except Exception as e:
+                print(f"[MicRingBuffer] Capture error: {e}")
+                break
+            self.write(np.asarray(frame, dtype=np.int16))
+        self._closed = True
+        with self._cond:
+            self._cond.notify_all()
+
+    def _put(self, index, samples):
+        self._ring[index:index + len(samples)] = samples
+        if index < MAX_READ_SAMPLES:
+            mirrored = samples[:MAX_READ_SAMPLES - index]
+            self._ring[self.capacity + index:self.capacity + index + len(mirrored)] = mirrored
+
+    def write(self, samples):
+        """Append samples; called by the capture thread (or directly when feeding a file)."""
+        start = self._write_pos % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._put(start, samples[:first])
+        if first < len(samples):
+            self._put(0, samples[first:])
+        with self._cond:
+            self._write_pos += len(samples)
+            self._cond.notify_all()
+
+    def reader(self, start=None, preroll_seconds=0.0):
+        """A reader starting at `start` (default: now) minus the pre-roll."""
+        start = self._write_pos if start is None else start
+        return MicReader(self, start - int(preroll_seconds * SAMPLE_RATE))
+
+    def _view(self, position, count):
+        begin = position % self.capacity
+        return self._ring[begin:begin + count]
+
+
+class MicReader:
+    """Independent cursor into a MicRingBuffer."""
+
+    def __init__(self, buffer, position):
+        self.buffer = buffer
+        oldest = max(0, buffer.position - buffer.capacity)
+        self.position = max(position, oldest)
+        self.overruns = 0
+
+    def read(self, count, timeout=1.0):
+        """Next `count` samples as a read-only view, or None on timeout/shutdown.
+
+        The view stays valid until the writer laps it, so copy (e.g. .tobytes()) anything
+        that is kept. A reader that falls a full ring behind skips ahead and counts an overrun.
+        """
+        if count > MAX_READ_SAMPLES:
+            raise ValueError(f"reads are limited to {MAX_READ_SAMPLES} samples")
+        buf = self.buffer
+        with buf._cond:
+            if not buf._cond.wait_for(lambda: buf._write_pos - self.position >= count or buf._closed,
+                                      timeout=timeout):
+                return None
+            if buf._write_pos - self.position < count:
+                return None
+            if buf._write_pos - self.position > buf.capacity:
+                self.overruns += 1
+                self.position = buf._write_pos - buf.capacity
+        view = buf._view(self.position, count)
+        self.position += count
+        view.flags.writeable = False
+        return view
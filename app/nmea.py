@@ -0,0 +1,184 @@
+"""Incremental NMEA 0183 decoding for the GPS receiver.
+
+NMEAParser.feed() takes whatever bytes the serial port has buffered, keeps any partial
+sentence for the next call, verifies each checksum and decodes RMC, GGA, VTG and GSA from
+any talker (GP, GN, GL, ...). It returns one GPSFix per epoch, at the receiver's native
+rate, as soon as the epoch has every sentence kind the previous epoch had, so position,
+speed and quality in a fix all describe the same moment.
+"""
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+KNOTS_TO_MS = 0.514444
+KMH_TO_MS = 1 / 3.6
+MAX_BUFFER = 4096  # bytes of unterminated input kept; anything longer is line noise
+
+# PMTK (MediaTek) commands for the receiver's output
+PMTK_SET_BAUD = "PMTK251,{baud}"
+PMTK_SET_RATE = "PMTK220,{interval_ms}"
+# Output only RMC, VTG, GGA and GSA, every fix (GLL and GSV off)
+PMTK_SET_OUTPUT = "PMTK314,0,1,1,1,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0"
+
+
+@dataclass
+class GPSFix:
+    """Position and quality for one epoch, merged from every sentence that carried it."""
+    utc: str = ""  # hhmmss.ss of the epoch
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    valid: bool = False  # RMC status A / GGA quality > 0
+    fix_quality: int = 0  # GGA: 0 none, 1 GPS, 2 DGPS, ...
+    fix_type: int = 1  # GSA: 1 none, 2 2D, 3 3D
+    satellites: int = 0
+    hdop: Optional[float] = None
+    pdop: Optional[float] = None
+    vdop: Optional[float] = None
+    altitude: Optional[float] = None  # meters above mean sea level
+    speed: Optional[float] = None  # m/s over ground
+    course: Optional[float] = None  # degrees true over ground
+    received_at: float = field(default_factory=time.monotonic)
+
+
+def checksum(body):
+    """XOR of every character between "$" and "*"."""
+    value = 0
+    for char in body.encode("ascii", errors="replace"):
+        value ^= char
+    return value
+
+
+def pmtk_command(body):
+    """Full sentence, checksum and line ending included, for a PMTK command body."""
+    return f"${body}*{checksum(body):02X}\r\n".encode("ascii")
+
+
+def _coordinate(value, hemisphere):
+    """Degrees from NMEA ddmm.mmmm / dddmm.mmmm; None when the field is empty."""
+    if not value:
+        return None
+    raw = float(value)
+    degrees = int(raw / 100)
+    result = degrees + (raw - degrees * 100) / 60
+    return -result if hemisphere in ("S", "W") else result
+
+
+def _float(value):
+    return float(value) if value else None
+
+
+def _int(value, default=0):
+    return int(value) if value else default
+
+
+POSITION_KINDS = {"RMC", "GGA"}
+
+
+class NMEAParser:
+    def __init__(self):
+        self._buffer = bytearray()
+        self.fix = GPSFix()  # the epoch being assembled
+        self._epoch_kinds = set()  # sentence kinds seen in the current epoch
+        self._expected = set()  # kinds the previous epoch had; the current one is done once it has them too
+        self._emitted = False
+        self._ready = []
+        self.counters = {"sentences": 0, "fixes": 0, "bad_checksum": 0, "malformed": 0, "ignored": 0}
+
+    def feed(self, data: bytes) -> List[GPSFix]:
+        """Decode the complete sentences in `data` (plus anything left from the last call)."""
+        self._buffer += data
+        *lines, rest = self._buffer.split(b"\n")
+        self._buffer = bytearray(rest[-MAX_BUFFER:])
+        for line in lines:
+            self.parse_line(line.decode("ascii", errors="replace").strip())
+        fixes, self._ready = self._ready, []
+        return fixes
+
+    def parse_line(self, line):
+        """Apply one sentence; fixes of completed epochs are collected for feed() to return."""
+        start = line.find("$")
+        if start < 0:
+            return
+        body, star, given = line[start + 1:].partition("*")
+        try:
+            if not star or int(given[:2], 16) != checksum(body):
+                self.counters["bad_checksum"] += 1
+                return
+        except ValueError:
+            self.counters["bad_checksum"] += 1
+            return
+
+        fields = body.split(",")
+        kind = fields[0][-3:]
+        handler = getattr(self, f"_parse_{kind.lower()}", None)
+        if handler is None or len(fields[0]) != 5:
+            self.counters["ignored"] += 1
+            return
+        self.counters["sentences"] += 1
+        try:
+            handler(fields)
+        except (ValueError, IndexError):
+            self.counters["malformed"] += 1
+            return
+        if not self._emitted and self._expected and self._epoch_kinds >= self._expected:
+            self._finish()
+
+    def _begin(self, kind, utc=None):
+        """Count a sentence towards the current epoch, or start the next epoch with it.
+
+        A position sentence with a new time (or a second one of the same kind, for a
+        receiver without a clock yet) starts the next epoch; the previous one is emitted
+        then if it never completed.
+        """
+        if kind in POSITION_KINDS and self._epoch_kinds and (utc != self.fix.utc or kind in self._epoch_kinds):
+            self._finish()
+            self._expected, self._epoch_kinds = self._epoch_kinds, set()
+            self.fix = replace(self.fix, utc=utc, received_at=time.monotonic())
+            self._emitted = False
+        elif kind in POSITION_KINDS and not self._epoch_kinds & POSITION_KINDS:
+            self.fix.utc, self.fix.received_at = utc, time.monotonic()
+        self._epoch_kinds.add(kind)
+
+    def _finish(self):
+        if not self._emitted and self._epoch_kinds & POSITION_KINDS:
+            self._ready.append(replace(self.fix))
+            self.counters["fixes"] += 1
+        self._emitted = True
+
+    def _position(self, lat, lon, valid):
+        self.fix.lat, self.fix.lon, self.fix.valid = lat, lon, valid and lat is not None and lon is not None
+
+    def _parse_rmc(self, f):
+        # $xxRMC,time,status,lat,N/S,lon,E/W,speed(knots),course,date,...
+        self._begin("RMC", f[1])
+        self._position(_coordinate(f[3], f[4]), _coordinate(f[5], f[6]), f[2] == "A")
+        knots = _float(f[7])
+        self.fix.speed = knots * KNOTS_TO_MS if knots is not None else None
+        self.fix.course = _float(f[8])
+
+    def _parse_gga(self, f):
+        # $xxGGA,time,lat,N/S,lon,E/W,quality,satellites,hdop,altitude,M,...
+        self._begin("GGA", f[1])
+        quality = _int(f[6])
+        self._position(_coordinate(f[2], f[3]), _coordinate(f[4], f[5]), quality > 0)
+        self.fix.fix_quality = quality
+        self.fix.satellites = _int(f[7])
+        self.fix.hdop = _float(f[8])
+        self.fix.altitude = _float(f[9])
+
+    def _parse_vtg(self, f):
+        # $xxVTG,course,T,course,M,speed,N,speed,K,...
+        self._begin("VTG")
+        self.fix.course = _float(f[1])
+        kmh = _float(f[7])
+        knots = _float(f[5])
+        if kmh is not None:
+            self.fix.speed = kmh * KMH_TO_MS
+        elif knots is not None:
+            self.fix.speed = knots * KNOTS_TO_MS
+
+    def _parse_gsa(self, f):
+        # $xxGSA,mode,fix type,12 satellite ids,pdop,hdop,vdop
+        self._begin("GSA")
+        self.fix.fix_type = _int(f[2], 1)
+        self.fix.pdop, self.fix.hdop, self.fix.vdop = _float(f[15]), _float(f[16]), _float(f[17])
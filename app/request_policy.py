@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from app.utils import STT_TIMEOUT, TTS_TIMEOUT, GPT_TIMEOUT, MAPS_TIMEOUT
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+MIN_HEDGE_SAMPLES = 10  # latencies needed before the percentile replaces the default hedge delay
+POLL_INTERVAL = 0.1  # seconds between stop_event checks while waiting
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="request")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+def _retryable(result):
+    return getattr(result, "status_code", None) in RETRYABLE_STATUS
+
+
+def _close(result):
+    """Release a result nobody will read, e.g. a response or stream holding a connection."""
+    close = getattr(result, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def _close_abandoned(future):
+    if not future.cancelled() and future.exception() is None:
+        _close(future.result())
+
+
+class RequestPolicy:
+    """Deadline, retries and hedging for one kind of cloud call.
+
+    call(fn) runs fn(timeout) on a worker thread, where timeout is what the attempt may
+    spend, and returns its result. Attempts that raise or return a retryable HTTP status are
+    retried after a jittered exponential backoff until the stage deadline runs out. With
+    hedging on, a duplicate attempt is sent once the first has taken longer than the
+    hedge_percentile of recent latencies, and whichever finishes first wins; only use it for
+    idempotent calls.
+    """
+
+    def __init__(self, name, deadline, attempt_timeout=None, retries=2, backoff=0.2, max_backoff=2.0,
+                 hedge=False, hedge_percentile=0.95, hedge_delay=1.0, min_hedge_delay=0.1, window=200):
+        self.name = name
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout or deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_misses": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def hedge_delay(self):
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return self.default_hedge_delay
+        index = min(len(samples) - 1, int(self.hedge_percentile * len(samples)))
+        return max(self.min_hedge_delay, samples[index])
+
+    def _sleep(self, seconds, stop_event):
+        if stop_event is None:
+            time.sleep(seconds)
+        elif stop_event.wait(seconds):
+            raise RequestCancelled(self.name)
+
+    def _attempt(self, fn, deadline, hedge, stop_event):
+        started = {}
+
+        def submit():
+            timeout = max(0.01, min(self.attempt_timeout, deadline - time.monotonic()))
+            future = _executor.submit(fn, timeout)
+            started[future] = time.monotonic()
+            return future
+
+        first = submit()
+        pending = {first}
+        hedge_at = started[first] + self.hedge_delay() if hedge else None
+        error = None
+        winner = None
+        try:
+            while True:
+                now = time.monotonic()
+                if stop_event is not None and stop_event.is_set():
+                    raise RequestCancelled(self.name)
+                if now >= deadline:
+                    self._count("deadline_misses")
+                    raise DeadlineExceeded(f"{self.name} exceeded its {self.deadline}s deadline")
+
+                wake = min(deadline, now + POLL_INTERVAL, hedge_at or deadline)
+                done, pending = wait(pending, timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        with self._lock:
+                            self._latencies.append(time.monotonic() - started[future])
+                        if future is not first:
+                            self._count("hedge_wins")
+                        winner = future
+                        return future.result()
+                    error = future.exception()
+                if not pending:
+                    raise error
+
+                if hedge_at is not None and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    self._count("hedges")
+                    pending.add(submit())
+        finally:
+            # Attempts still running (or losing hedges) would leave their connection checked
+            # out; close whatever they return once they finish
+            for future in started:
+                if future is not winner:
+                    future.add_done_callback(_close_abandoned)
+
+    def call(self, fn, stop_event=None, retries=None, hedge=None):
+        """Run fn(timeout) under this policy. Pass retries=0, hedge=False for one-shot calls
+        such as a streamed upload whose body can't be replayed."""
+        self._count("calls")
+        deadline = time.monotonic() + self.deadline
+        retries = self.retries if retries is None else retries
+        hedge = self.hedge if hedge is None else hedge
+        error = None
+        last_result = None
+
+        for attempt in range(retries + 1):
+            if attempt:
+                self._count("retries")
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    break
+                self._sleep(delay, stop_event)
+            try:
+                result = self._attempt(fn, deadline, hedge, stop_event)
+            except (DeadlineExceeded, RequestCancelled):
+                raise
+            except Exception as e:
+                print(f"[RequestPolicy] {self.name} attempt {attempt + 1} failed: {e}")
+                _close(last_result)
+                error, last_result = e, None
+                continue
+            _close(last_result)
+            if _retryable(result) and attempt < retries:
+                print(f"[RequestPolicy] {self.name} attempt {attempt + 1} returned {result.status_code}")
+                error, last_result = None, result
+                continue
+            return result
+
+        if error is not None:
+            raise error
+        if last_result is not None:
+            return last_result
+        self._count("deadline_misses")
+        raise DeadlineExceeded(f"{self.name} exceeded its {self.deadline}s deadline")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["hedge_delay"] = round(self.hedge_delay(), 3)
+        return stats
+
+
+STT_POLICY = RequestPolicy("stt", deadline=STT_TIMEOUT, retries=1)
+TTS_POLICY = RequestPolicy("tts", deadline=TTS_TIMEOUT, attempt_timeout=8.0, hedge=True, hedge_delay=1.5)
+GPT_POLICY = RequestPolicy("gpt", deadline=GPT_TIMEOUT, retries=1)
+MAPS_POLICY = RequestPolicy("maps", deadline=MAPS_TIMEOUT, attempt_timeout=5.0, hedge=True, hedge_delay=1.0)
+
+
+def policy_stats():
+    return {policy.name: policy.stats() for policy in (STT_POLICY, TTS_POLICY, GPT_POLICY, MAPS_POLICY)}
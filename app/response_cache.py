@@ -0,0 +1,136 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+from app.utils import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL
+
+VECTOR_DIM = 1 << 12
+
+# Words that carry no meaning for matching questions to each other
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "do", "does", "you", "your", "me", "i", "we", "us", "of", "to",
+    "in", "at", "on", "for", "can", "could", "please", "tell", "about", "hellum", "there", "here",
+}
+_SYNONYMS = {"which": "what", "whats": "what", "what's": "what"}
+# Words that only phrase the question; every other word names what is being asked about
+_PHRASING = {
+    "what", "how", "much", "know", "want", "like", "would", "give", "get", "info",
+    "information", "detail", "kindly", "some", "any", "my", "i'd", "it", "its", "it's", "be",
+}
+
+
+def normalize_question(text):
+    # Dots join abbreviations ("B.Tech" -> "btech") before punctuation is dropped
+    words = re.sub(r"[^a-z0-9' ]+", " ", text.lower().replace(".", "")).split()
+    return [_SYNONYMS.get(word, word) for word in words if word not in _STOPWORDS]
+
+
+def _stem(word):
+    """Crude plural folding, so "fees" and "fee" count as the same word."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "'s")) and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def key_terms(words):
+    """The words of a normalized question that name its subject: entities, numbers, topics.
+
+    Two questions can score high on n-gram similarity while asking about different things
+    ("btech" vs "mtech", "2024" vs "2025"), so a cached answer is only reused when these
+    match exactly.
+    """
+    return frozenset(_stem(word) for word in words if word not in _PHRASING)
+
+
+def vectorize(text):
+    """Unit vector of hashed word unigrams, word bigrams and character trigrams."""
+    words = normalize_question(text)
+    features = list(words)
+    features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h & (VECTOR_DIM - 1)] += -1.0 if h & VECTOR_DIM else 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ResponseCache:
+    """Answers to earlier questions, looked up by cosine similarity of hashed n-gram vectors.
+
+    get() returns the answer of the most similar cached question if it scores at least
+    `threshold`, has the same key terms and is younger than `ttl` seconds. Entries are evicted least recently used
+    beyond max_entries. Only plain answers belong here; tool calls depend on live state.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, threshold=RESPONSE_CACHE_THRESHOLD, ttl=RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # normalized question -> (vector, answer, stored_at, key terms), oldest first
+        self._matrix = None  # stacked vectors in _keys order, rebuilt lazily after put() or expiry
+        self._keys = []
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, question):
+        return " ".join(normalize_question(question))
+
+    def _expire(self, now):
+        for key in [key for key, entry in self._entries.items() if now - entry[2] > self.ttl]:
+            del self._entries[key]
+            self._matrix = None
+
+    def get(self, question):
+        """(answer, similarity) for the closest fresh question, or (None, best similarity)."""
+        vector = vectorize(question)
+        with self._lock:
+            self._expire(time.time())
+            if not self._entries or not vector.any():
+                self.misses += 1
+                return None, 0.0
+            if self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.stack([self._entries[key][0] for key in self._keys])
+
+            scores = self._matrix @ vector
+            terms = key_terms(normalize_question(question))
+            for index in np.argsort(-scores):
+                similarity = float(scores[index])
+                if similarity < self.threshold:
+                    break
+                key = self._keys[index]
+                entry = self._entries[key]
+                if entry[3] == terms:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], similarity
+
+            self.misses += 1
+            return None, float(scores.max())
+
+    def put(self, question, answer):
+        key = self._key(question)
+        if not key or not answer:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (vectorize(question), answer, time.time(), key_terms(key.split()))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -1,26 +1,26 @@
-import serial
 import tkinter as tk
-import time
+from app.serial_bus import get_serial_bus
 
 # Adjust this port if necessary (check with `dmesg | grep tty`)
 SERIAL_PORT = '/dev/ttyACM0'
 BAUD_RATE = 115200
 
-# Connect to Arduino
-try:
-    arduino = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-    time.sleep(2)  # Wait for Arduino to reset
-    print("Connected to Arduino")
-except:
+# Connect to Arduino (waits for it to reset)
+arduino = get_serial_bus(SERIAL_PORT, BAUD_RATE)
+if not arduino.connected:
     print("Error: Could not connect to Arduino")
     exit()
+print("Connected to Arduino")
 
-# Function to send command and print response
+def show_reply(future):
+    try:
+        print("Arduino:", future.result())
+    except ConnectionError as e:
+        print("Error:", e)
+
+# Function to send command and print response when it arrives
 def send(cmd):
-    arduino.write((cmd + '\n').encode())
-    time.sleep(0.1)
-    while arduino.in_waiting:
-        print("Arduino:", arduino.readline().decode().strip())
+    arduino.send(cmd).add_done_callback(show_reply)
 
 # Handle key press events
 def key(event):
@@ -0,0 +1,230 @@
+import itertools
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import serial
+
+ARDUINO_PORT = "/dev/ttyACM0"
+ARDUINO_BAUD = 115200
+RESET_DELAY = 2.0  # seconds; opening the port resets the Arduino
+RECONNECT_INTERVAL = 5.0  # seconds between attempts to reopen a lost port
+REQUEST_TIMEOUT = 1.0  # seconds to wait for a reply
+MAX_SEQ = 10000  # sequence ids wrap at this value; the firmware echoes them as text
+
+# Replies look like "#<seq>:<body>" and pushed data "@<tag>,<payload>"; anything else is a
+# message the firmware sent on its own
+_FRAME = re.compile(r"^#(\d+):(.*)$")
+
+
+class SerialBus:
+    """Sole owner of one serial port, shared by everything that talks to the Arduino.
+
+    Commands go out as "#<seq>:<command>" lines from a writer thread, and a reader thread
+    hands each "#<seq>:<reply>" line to whoever sent that sequence id. Callers never touch
+    the port, so a sensor poll and a motor command can be in flight at the same time and
+    neither can read (or flush away) the other's reply. Lines the firmware pushes unasked,
+    such as telemetry frames, go to the callback subscribed for their tag.
+    """
+
+    def __init__(self, port=ARDUINO_PORT, baud=ARDUINO_BAUD, on_message=None):
+        self.port = port
+        self.baud = baud
+        self.on_message = on_message  # called with unframed lines, e.g. boot messages
+        self.ser = None
+        self._seq = itertools.count(1)
+        self._pending = {}  # seq -> Future waiting for its reply
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()  # one opener at a time; held through the reset delay
+        self._outbox = queue.Queue()
+        self._reader = None
+        self._writer = None
+        self._last_attempt = 0.0
+        self._subscribers = {}  # tag -> callback for pushed "@<tag>,<payload>" lines
+        self.counters = {"sent": 0, "replies": 0, "timeouts": 0, "unmatched": 0, "errors": 0, "callback_errors": 0}
+
+    @property
+    def connected(self):
+        return self.ser is not None
+
+    def open(self):
+        """Open the port and start the reader and writer threads; True when connected."""
+        # _lock is not held while the Arduino resets, so requests, stats() and the other
+        # threads aren't stalled behind the open
+        with self._open_lock:
+            if self.ser is not None:
+                return True
+            self._last_attempt = time.monotonic()
+            try:
+                ser = serial.Serial(self.port, self.baud, timeout=1)
+            except (serial.SerialException, OSError) as e:
+                print(f"[SerialBus] Could not open {self.port}: {e}")
+                return False
+            time.sleep(RESET_DELAY)
+            ser.reset_input_buffer()  # boot chatter; nothing can be pending yet
+            with self._lock:
+                self.ser = ser
+                self._outbox = queue.Queue()
+                self._reader = threading.Thread(target=self._read_loop, args=(ser,), daemon=True)
+                self._writer = threading.Thread(target=self._write_loop, args=(ser, self._outbox), daemon=True)
+                self._reader.start()
+                self._writer.start()
+        print(f"[SerialBus] Connected to {self.port}")
+        return True
+
+    def _ensure_open(self):
+        if self.ser is not None:
+            return True
+        if time.monotonic() - self._last_attempt < RECONNECT_INTERVAL:
+            return False
+        return self.open()
+
+    def _next_seq(self):
+        seq = next(self._seq) % MAX_SEQ
+        return seq or next(self._seq) % MAX_SEQ
+
+    def send(self, command):
+        """Queue `command` and return a Future for the reply body (a str).
+
+        The Future fails with ConnectionError if the port isn't open or is lost before the
+        reply arrives.
+        """
+        future = Future()
+        if not self._ensure_open():
+            future.set_exception(ConnectionError(f"{self.port} is not connected"))
+            return future
+        with self._lock:
+            seq = self._next_seq()
+            future.seq = seq
+            self._pending[seq] = future
+            outbox = self._outbox
+        outbox.put(f"#{seq}:{command}\n".encode("ascii"))
+        return future
+
+    def request(self, command, timeout=REQUEST_TIMEOUT):
+        """Send `command` and wait for its reply; None on timeout or a lost connection."""
+        future = self.send(command)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._pending.pop(getattr(future, "seq", None), None)
+                self.counters["timeouts"] += 1
+            return None
+        except ConnectionError:
+            return None
+
+    def subscribe(self, tag, callback):
+        """Call callback(payload) from the reader thread for each pushed "@<tag>,<payload>" line."""
+        with self._lock:
+            self._subscribers[tag] = callback
+
+    def unsubscribe(self, tag):
+        with self._lock:
+            self._subscribers.pop(tag, None)
+
+    def _write_loop(self, ser, outbox):
+        while True:
+            frame = outbox.get()
+            if frame is None:
+                return
+            try:
+                ser.write(frame)
+                with self._lock:
+                    self.counters["sent"] += 1
+            except (serial.SerialException, OSError) as e:
+                self._lost(ser, e)
+                return
+
+    def _read_loop(self, ser):
+        while self.ser is ser:
+            try:
+                line = ser.readline()
+            except (serial.SerialException, OSError, TypeError) as e:
+                # pyserial raises TypeError when the port is closed under a blocked read
+                self._lost(ser, e)
+                return
+            if not line:
+                continue
+            text = line.decode("utf-8", errors="replace").strip()
+            if text.startswith("@"):
+                tag, _, payload = text[1:].partition(",")
+                self._deliver(self._subscribers.get(tag), payload)
+                continue
+
+            frame = _FRAME.match(text)
+            if frame is None:
+                if text:
+                    self._deliver(self.on_message, text)
+                continue
+
+            with self._lock:
+                future = self._pending.pop(int(frame.group(1)), None)
+                self.counters["replies" if future is not None else "unmatched"] += 1
+            if future is not None:
+                future.set_result(frame.group(2))
+
+    def _deliver(self, callback, text):
+        """Run a subscriber or on_message callback; its errors must not stop the reader."""
+        if callback is None:
+            return
+        try:
+            callback(text)
+        except Exception as e:
+            with self._lock:
+                self.counters["callback_errors"] += 1
+            print(f"[SerialBus] Callback for {text[:40]!r} failed: {e}")
+
+    def _lost(self, ser, error):
+        with self._lock:
+            if self.ser is not ser:
+                return
+            self.ser = None
+            self.counters["errors"] += 1
+            pending, self._pending = self._pending, {}
+            self._outbox.put(None)
+        print(f"[SerialBus] Lost {self.port}: {error}")
+        for future in pending.values():
+            future.set_exception(ConnectionError(f"{self.port} was lost"))
+        try:
+            ser.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            ser, self.ser = self.ser, None
+            pending, self._pending = self._pending, {}
+            self._outbox.put(None)
+        for future in pending.values():
+            future.set_exception(ConnectionError(f"{self.port} was closed"))
+        if ser is not None:
+            ser.close()
+        for thread in (self._reader, self._writer):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=1)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._pending)
+        return stats
+
+
+def _log_message(text):
+    print(f"[Arduino] {text}")
+
+
+_buses = {}
+_buses_lock = threading.Lock()
+
+
+def get_serial_bus(port=ARDUINO_PORT, baud=ARDUINO_BAUD):
+    """Process-wide bus for `port`, opened on first use."""
+    with _buses_lock:
+        bus = _buses.get(port)
+        if bus is None:
+            bus = _buses[port] = SerialBus(port, baud, on_message=_log_message)
+            bus.open()
+        return bus
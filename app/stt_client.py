@@ -0,0 +1,82 @@
+import inspect
+import struct
+from app.http_client import get_http_client
+from app.request_policy import STT_POLICY
+from app.utils import AZURE_SPEECH_KEY, STT_ENDPOINT
+
+SAMPLE_RATE = 16000
+STREAMING_SIZE = 0xFFFFFFFF  # RIFF/data size for a WAV whose length isn't known up front
+
+
+def wav_header(rate=SAMPLE_RATE, channels=1, sample_width=2, data_size=STREAMING_SIZE):
+    """44-byte PCM WAV header; the default sizes mark a stream of unknown length."""
+    riff_size = STREAMING_SIZE if data_size == STREAMING_SIZE else data_size + 36
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, channels, rate, rate * channels * sample_width, channels * sample_width,
+        sample_width * 8,
+        b"data", data_size
+    )
+
+
+def _streamed_body(chunks, stop_event=None):
+    """WAV stream for the upload. `chunks` is closed here, on the thread that consumes it."""
+    try:
+        yield wav_header()
+        for chunk in chunks:
+            if stop_event is not None and stop_event.is_set():
+                return
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _close_body(body, chunks):
+    """Finish a streamed body the upload left behind (cancelled, timed out or never started)."""
+    started = inspect.getgeneratorstate(body) != inspect.GEN_CREATED
+    try:
+        body.close()
+    except ValueError:
+        return  # still being read on the upload thread, which closes `chunks` when it stops
+    close = getattr(chunks, "close", None)
+    if not started and close is not None:
+        close()
+
+
+def transcribe(audio, url=None, stop_event=None, language="en-US"):
+    """Recognize 16 kHz mono 16-bit PCM and return the display text ("" on failure).
+
+    `audio` is either bytes of a finished recording or an iterable of PCM chunks. Chunks are
+    uploaded with chunked transfer encoding as the iterable produces them, so recognition
+    runs while the visitor is still talking and the result arrives soon after the last chunk.
+    A chunk generator is closed once the upload is done with it; don't close it yourself,
+    since the upload may still be reading it on another thread.
+    """
+    headers = {
+        "Ocp-Apim-Subscription-Key": AZURE_SPEECH_KEY or "",
+        "Content-Type": f"audio/wav; codec=audio/pcm; samplerate={SAMPLE_RATE}"
+    }
+    params = {"language": language, "format": "simple"}
+    if isinstance(audio, (bytes, bytearray)):
+        body = wav_header(data_size=len(audio)) + bytes(audio)
+        retries = None
+    else:
+        body = _streamed_body(audio, stop_event)
+        retries = 0  # a streamed body can't be replayed
+
+    def post(timeout):
+        return get_http_client().post(url or STT_ENDPOINT, headers=headers, params=params, data=body,
+                                      timeout=timeout)
+
+    try:
+        response = STT_POLICY.call(post, stop_event=stop_event, retries=retries)
+        return response.json().get("DisplayText", "") if response.status_code == 200 else ""
+    except Exception as e:
+        print(f"STT Error: {e}")
+        return ""
+    finally:
+        if retries == 0:
+            _close_body(body, audio)
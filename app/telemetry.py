@@ -0,0 +1,54 @@
+import time
+from dataclasses import dataclass, field
+
+TELEMETRY_VERSION = 2  # firmware protocol version that understands the T command
+TELEMETRY_TAG = "T"  # pushed frames arrive as "@T,<fields>"
+MAX_TELEMETRY_RATE = 20  # Hz; three ultrasonic pings take up to ~50 ms per frame
+NO_HEADING = -1.0  # what the firmware reports without a magnetometer
+
+
+@dataclass
+class TelemetryFrame:
+    """One pushed sensor frame: "<count>,<millis>,<front>,<left>,<right>,<heading x10>".
+
+    Distances are in cm and heading in tenths of a degree (-10 without a magnetometer), all
+    plain integers so decoding is a split and six int() calls rather than a JSON parse.
+    """
+    count: int
+    millis: int
+    front: int
+    left: int
+    right: int
+    heading: float
+    received_at: float = field(default_factory=time.monotonic)
+
+    FIELDS = 6
+
+    @classmethod
+    def decode(cls, payload):
+        """Frame from the payload after the "@T," tag, or None if it is malformed."""
+        fields = payload.split(",")
+        if len(fields) != cls.FIELDS:
+            return None
+        try:
+            count, millis, front, left, right, heading = map(int, fields)
+        except ValueError:
+            return None
+        return cls(count, millis, front, left, right, heading / 10.0 if heading >= 0 else NO_HEADING)
+
+    def as_sensor_data(self):
+        """Same shape as the firmware's JSON reply to S."""
+        return {
+            "ultrasonic": {"front": self.front, "left": self.left, "right": self.right},
+            "magnetometer": self.heading,
+        }
+
+
+def parse_version(reply):
+    """Protocol version from the reply to V ("V:<n>"); 1 for firmware that predates it."""
+    if reply and reply.startswith("V:"):
+        try:
+            return int(reply[2:])
+        except ValueError:
+            pass
+    return 1
@@ -1,64 +1,203 @@
-import requests
-import pyaudio
+import re
+import queue
 import time
 import wave
 import threading
 from io import BytesIO
-from app.utils import AZURE_SPEECH_KEY, AZURE_SPEECH_REGION
+from app.utils import AZURE_SPEECH_KEY, TTS_ENDPOINT
+from app.audio_cache import AudioCache, get_audio_cache
+from app.audio_engine import AudioEngine
+from app.http_client import get_http_client
+from app.request_policy import TTS_POLICY
+
+# Headerless PCM lets sentences be synthesized separately and played back to back
+PIPELINE_FORMAT = "raw-24khz-16bit-mono-pcm"
+PIPELINE_RATE = 24000
+PIPELINE_SAMPLE_WIDTH = 2
+PLAYBACK_LOOKAHEAD = 0.2  # seconds of audio left queued when the next sentence is handed over
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+MIN_SENTENCE_CHARS = 20  # shorter fragments are merged into the next sentence
+
+
+class SentenceSegmenter:
+    """Incremental sentence splitter for text that arrives in pieces (e.g. streamed GPT output).
+
+    feed() returns the sentences completed so far; a sentence counts as complete once its
+    terminator is followed by whitespace. Fragments shorter than MIN_SENTENCE_CHARS are
+    merged into the next sentence, as in split_sentences.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pending = ""
+
+    def _merge(self, part):
+        self._pending = f"{self._pending} {part}".strip() if self._pending else part.strip()
+        if len(self._pending) >= MIN_SENTENCE_CHARS:
+            sentence, self._pending = self._pending, ""
+            return sentence
+        return None
+
+    def feed(self, text):
+        self._buffer += text
+        parts = _SENTENCE_END.split(self._buffer.lstrip())
+        self._buffer = parts.pop()  # still open
+        return [sentence for sentence in map(self._merge, parts) if sentence]
+
+    def flush(self):
+        """Everything left over, as a final sentence list."""
+        sentence = self._merge(self._buffer) or self._pending
+        self._buffer = self._pending = ""
+        return [sentence] if sentence else []
+
+
+def split_sentences(text):
+    """Split text into sentences, merging fragments too short to be worth a request."""
+    segmenter = SentenceSegmenter()
+    return segmenter.feed(text.strip()) + segmenter.flush()
+
+
+def iter_sentences(chunks):
+    """Sentences from an iterable of text chunks, each yielded as soon as it is complete."""
+    segmenter = SentenceSegmenter()
+    try:
+        for chunk in chunks:
+            yield from segmenter.feed(chunk)
+        yield from segmenter.flush()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()  # an abandoned generator may hold a network stream
+
 
 class TextToSpeechStreamer:
-    def __init__(self, stop_event=None):
+    def __init__(self, stop_event=None, cache=None, engine=None):
         self.stop_event = stop_event or threading.Event()
+        self.cache = cache if cache is not None else get_audio_cache()
         self.audio_queue = []
-        self.p = pyaudio.PyAudio()
-        self.stream = None
+        self.engine = engine or AudioEngine.instance()
         self.voice_name = "en-US-AriaNeural"
-        self.tts_url = f"https://{AZURE_SPEECH_REGION}.tts.speech.microsoft.com/cognitiveservices/v1"
+        self.tts_url = TTS_ENDPOINT
         self.headers = {
             "Ocp-Apim-Subscription-Key": AZURE_SPEECH_KEY,
             "Content-Type": "application/ssml+xml",
             "X-Microsoft-OutputFormat": "riff-24khz-16bit-mono-pcm"
         }
 
-    def _synthesize(self, text):
+    def _synthesize(self, text, output_format=None, stop_event=None):
         ssml = f"""<speak version='1.0' xml:lang='en-US'>
             <voice name='{self.voice_name}'>{text}</voice>
         </speak>"""
-        response = requests.post(self.tts_url, headers=self.headers, data=ssml.encode("utf-8"))
-        return response.content if response.status_code == 200 else None
+        headers = self.headers
+        if output_format:
+            headers = dict(headers, **{"X-Microsoft-OutputFormat": output_format})
 
-    def stream_text(self, text, stop_event=None):
-        if self.stop_event.is_set() or (stop_event and stop_event.is_set()):
+        key = AudioCache.make_key(self.voice_name, headers["X-Microsoft-OutputFormat"], ssml)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        def post(timeout):
+            return get_http_client().post(self.tts_url, headers=headers, data=ssml.encode("utf-8"), timeout=timeout)
+
+        try:
+            response = TTS_POLICY.call(post, stop_event=stop_event or self.stop_event)
+        except Exception as e:
+            print(f"[TTS] Request failed: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+        self.cache.put(key, response.content)
+        return response.content
+
+    def _stopped(self, stop_event=None):
+        return self.stop_event.is_set() or (stop_event is not None and stop_event.is_set())
+
+    def stream_text(self, text, stop_event=None, pipelined=True):
+        if self._stopped(stop_event):
             return
 
-        audio_data = self._synthesize(text)
+        if pipelined:
+            self.stream_sentences(split_sentences(text), stop_event)
+            return
+
+        audio_data = self._synthesize(text, stop_event=stop_event)
         if not audio_data:
             return
 
-        wav_file = BytesIO(audio_data)
-        with wave.open(wav_file, 'rb') as wf:
-            def callback(in_data, frame_count, time_info, status):
-                data = wf.readframes(frame_count)
-                return (data, pyaudio.paContinue)
-
-            self.stream = self.p.open(
-                format=self.p.get_format_from_width(wf.getsampwidth()),
-                channels=wf.getnchannels(),
-                rate=wf.getframerate(),
-                output=True,
-                stream_callback=callback
-            )
-
-            self.stream.start_stream()
-            while self.stream.is_active():
-                if self.stop_event.is_set() or (stop_event and stop_event.is_set()):
-                    self.stream.stop_stream()
+        with wave.open(BytesIO(audio_data), 'rb') as wf:
+            pcm = wf.readframes(wf.getnframes())
+            self.engine.play(pcm, wf.getframerate(), wf.getnchannels(), wf.getsampwidth(), source=self)
+        self._wait_for_playback(stop_event, 0)
+
+    def _wait_for_playback(self, stop_event, lookahead):
+        """Wait until at most `lookahead` seconds of our audio remain queued; flush ours on stop."""
+        while self.engine.queued_seconds(self) > lookahead:
+            if self._stopped(stop_event):
+                self.engine.flush(self)
+                return False
+            time.sleep(0.05)
+        return not self._stopped(stop_event)
+
+    def _synthesis_worker(self, sentences, pcm_queue, abort):
+        """Synthesize sentences in order, staying at most one sentence ahead of playback."""
+        try:
+            for sentence in sentences:
+                if abort.is_set():
+                    return
+                pcm = self._synthesize(sentence, PIPELINE_FORMAT, abort)
+                if not pcm:
+                    print(f"[TTS] Synthesis failed for: {sentence[:40]}")
+                    continue
+                while not abort.is_set():
+                    try:
+                        pcm_queue.put(pcm, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            print(f"[TTS] Synthesis error: {e}")
+        finally:
+            if hasattr(sentences, "close"):
+                sentences.close()
+            while not abort.is_set():
+                try:
+                    pcm_queue.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    def stream_sentences(self, sentences, stop_event=None):
+        """Play an iterable of sentences through one continuous output stream.
+
+        Sentence N+1 is synthesized on a worker thread while sentence N plays on the engine's
+        persistent output stream, so the time to first audio is the synthesis time of the
+        first sentence. The iterable may be a generator that is still producing text.
+        """
+        pcm_queue = queue.Queue(maxsize=1)
+        abort = threading.Event()
+        worker = threading.Thread(target=self._synthesis_worker, args=(sentences, pcm_queue, abort), daemon=True)
+        worker.start()
+
+        try:
+            while not self._stopped(stop_event):
+                try:
+                    pcm = pcm_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if pcm is None:
+                    self._wait_for_playback(stop_event, 0)
                     break
-                time.sleep(0.1)
 
-            self.stream.close()
+                self.engine.play(pcm, PIPELINE_RATE, 1, PIPELINE_SAMPLE_WIDTH, source=self)
+                # Hand over the next sentence just before this one runs out
+                if not self._wait_for_playback(stop_event, PLAYBACK_LOOKAHEAD):
+                    break
+        finally:
+            abort.set()
+            if self._stopped(stop_event):
+                self.engine.flush(self)
 
     def stop_speech(self):
-        if self.stream and self.stream.is_active():
-            self.stream.stop_stream()
-            self.stream.close()
\ No newline at end of file
+        """Silence this streamer; other streamers' speech keeps playing."""
+        self.engine.flush(self)
@@ -9,15 +9,34 @@ PV_ACCESS_KEY = os.getenv("PV_ACCESS_KEY")
 
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_SPEECH_REGION = os.getenv("AZURE_SPEECH_REGION")
+# Override to point speech recognition at another server, e.g. app/fake_stt_server.py
+STT_ENDPOINT = os.getenv("STT_ENDPOINT") or (
+    f"https://{AZURE_SPEECH_REGION}.stt.speech.microsoft.com"
+    "/speech/recognition/conversation/cognitiveservices/v1"
+)
+TTS_ENDPOINT = f"https://{AZURE_SPEECH_REGION}.tts.speech.microsoft.com/cognitiveservices/v1"
 
 AZURE_OPENAI_ENDPOINT = os.getenv("ENDPOINT_URL")
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 DEPLOYMENT_NAME = os.getenv("DEPLOYMENT_NAME")
 
+# Per-stage deadlines, enforced by app/request_policy.py (retries and hedges included)
 STT_TIMEOUT = 10  # seconds for speech recognition
-TTS_TIMEOUT = 60   # seconds for speech synthesis
-AUDIO_RECORD_TIMEOUT = 5  # seconds for audio recording
+TTS_TIMEOUT = 15   # seconds for speech synthesis of one sentence
+GPT_TIMEOUT = 20  # seconds until the GPT reply starts streaming
+MAPS_TIMEOUT = 10  # seconds for a geocoding or directions lookup
+AUDIO_RECORD_TIMEOUT = 5  # seconds for audio recording (longest utterance)
+LEADING_SILENCE_TIMEOUT = 3.0  # seconds to wait for the visitor to start talking
+TRAILING_SILENCE = 0.7  # seconds of silence that end an utterance
 WAKE_INTERRUPT_TIMEOUT = 0.7  # seconds for thread joining
+COMMAND_PREROLL = 0.25  # seconds of audio before the end of the wake word handed to the recorder
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "cache/tts")  # synthesized speech, reused across runs
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+RESPONSE_CACHE_SIZE = 256  # GPT answers kept for repeat questions
+RESPONSE_CACHE_THRESHOLD = 0.6  # cosine similarity for a repeat; key terms must match as well
+RESPONSE_CACHE_TTL = 6 * 60 * 60  # seconds before a cached answer is asked for again
 
 
 def get_wakeword_path():
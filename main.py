@@ -2,9 +2,14 @@ import os
 import threading
 import time
 from app.command_thread import CommandThread
-from app.utils import get_wakeword_path, PV_ACCESS_KEY
+from app.navigate import NavigationService
+from app.utils import get_wakeword_path, PV_ACCESS_KEY, COMMAND_PREROLL, WAKE_INTERRUPT_TIMEOUT
+from app.mic_buffer import MicRingBuffer
+from app.http_client import get_http_client
+from app import gpt_client
+from app.request_policy import policy_stats
+from app.audio_cache import get_audio_cache
 import pvporcupine
-from pvrecorder import PvRecorder
 import platform
 from dotenv import load_dotenv
 
@@ -14,9 +19,10 @@ load_dotenv()
 class MainProcess:
     def __init__(self):
         self._stop_event = threading.Event()
-        self.current_command_thread = None
+        self.command_worker = None
         self.porcupine = None
-        self.recorder = None
+        self.mic = None
+        self.wake_reader = None
 
     def get_wakeword_path(self):
         system = platform.system().lower()
@@ -35,33 +41,46 @@ class MainProcess:
                 keyword_paths=[wakeword_path],
                 sensitivities=[0.7]
             )
-            self.recorder = PvRecorder(
+            # One capture thread; wake word detection and command recording both read from it
+            self.mic = MicRingBuffer(
                 frame_length=self.porcupine.frame_length,
                 device_index=-1
             )
-            self.recorder.start()
+            self.mic.start()
+            self.wake_reader = self.mic.reader()
         except Exception as e:
             print(f"Audio initialization failed: {e}")
             self.cleanup()
             raise
 
+    def _prewarm_connections(self):
+        """Open (or refresh) keep-alive connections to the cloud services in the background"""
+        get_http_client().prewarm()
+        gpt_client.prewarm()
+
     def start_wakeword_detection(self):
         """Main loop for continuous wake word detection"""
         try:
             self._initialize_audio()
+            self._prewarm_connections()
+            # Serial ports, GPS and sensor loops come up in the background and stay up
+            NavigationService.instance().start()
+            # Built once: GPT client, TTS, audio engine and navigation are ready before the first command
+            self.command_worker = CommandThread()
+            self.command_worker.start()
             print("Listening for wake word 'Hellum'...")
 
             while not self._stop_event.is_set():
                 try:
-                    pcm = self.recorder.read()
+                    pcm = self.wake_reader.read(self.porcupine.frame_length)
+                    if pcm is None:
+                        continue  # no audio yet, or shutting down
                     result = self.porcupine.process(pcm)
 
                     if result >= 0:
                         print("\nWake word detected!")
                         self._handle_wakeword()
 
-                    time.sleep(0.01)  # Prevent CPU overuse
-
                 except Exception as e:
                     print(f"Detection error: {e}")
                     break  # Break only on critical errors
@@ -73,27 +92,28 @@ class MainProcess:
 
     def _handle_wakeword(self):
         """Handle wake word detection event"""
-        # Stop current command thread if it is already running.
-        if self.current_command_thread and self.current_command_thread.is_alive():
-            print("Interrupting previous command")
-            self.current_command_thread.stop()
-            self.current_command_thread.join(timeout=0.5)
+        # Connections may have idled out since the last command; reopen them while the visitor talks
+        self._prewarm_connections()
 
-        # Start the command thread (for processing voice commands, etc.).
-        self.current_command_thread = CommandThread()
-        self.current_command_thread.start()
+        # Queue the command (interrupting any in progress), recording from just before
+        # the end of the wake word so nothing said after it is lost.
+        mic_reader = self.mic.reader(self.wake_reader.position, preroll_seconds=COMMAND_PREROLL)
+        self.command_worker.submit(mic_reader)
 
     def cleanup(self):
         """Clean up all resources"""
         print("Cleaning up resources...")
         self._stop_event.set()
 
-        if self.recorder:
-            try:
-                self.recorder.stop()
-                self.recorder.delete()
-            except Exception as e:
-                print(f"Error stopping recorder: {e}")
+        if self.command_worker:
+            self.command_worker.stop()
+            self.command_worker.join(timeout=WAKE_INTERRUPT_TIMEOUT)
+            print(f"Response cache: {self.command_worker.response_cache.stats()}")
+
+        NavigationService.instance().shutdown()
+
+        if self.mic:
+            self.mic.stop()
 
         if self.porcupine:
             try:
@@ -101,6 +121,11 @@ class MainProcess:
             except Exception as e:
                 print(f"Error cleaning up porcupine: {e}")
 
+        # Hits only reach the index every 30 s; keep the latest LRU order for the next run
+        get_audio_cache().flush()
+        print(f"HTTP connection pools: {get_http_client().stats()}")
+        print(f"Request policies: {policy_stats()}")
+
 
 if __name__ == "__main__":
     main_process = MainProcess()